@@ -9,13 +9,23 @@
 #2. Middle initials might not be present
 #3. Last name, first name, and middle initial might not follow capitalized form
 
+#Large files can be loaded without prompts: python Assignment-1.py data/data.csv --batch
+#Batch mode writes valid rows to normalized.csv and invalid rows with their reasons to rejects.csv (see ingest.py)
+#Add --repair to fix common ID and phone variants (e.g. 5557771212 -> 555-777-1212) instead of rejecting them (see normalize.py)
+#Employees are saved to person_dictionary.bin, a compact file that is read one employee at a time by ID (see person_store.py)
+#Batch mode only writes the compact file when asked: python Assignment-1.py data/data.csv --batch --store employees.bin
 
-import sys
-import re
-import pickle
+
+import argparse
+from ingest import PATTERN_ID, PATTERN_PHONE, ingestFile
+from normalize import REPAIRED, normalizeId, normalizePhone
+from person_store import PersonTable, PersonStore
 
 #define a Person class to hold parsed information
+#__slots__ drops the per-object attribute dictionary
 class Person:
+    __slots__ = ('last', 'first', 'mi', 'id', 'phone')
+
     def __init__(self, last, first, mi, id, phone):
         self.last = last
         self.first = first
@@ -29,12 +39,13 @@ class Person:
         print(f'Employee Name: {self.first} {self.mi} {self.last}')
         print(f'Employee Phone: {self.phone}')
 
+    #Return the fields as a (last, first, mi, id, phone) record
+    def record(self):
+        return (self.last, self.first, self.mi, self.id, self.phone)
 
-def processFile(fName):
-    
-    #Set regex patterns to check for invalid id and phone number
-    pattern_id = re.compile('[A-Z]{2}\d{4}')
-    pattern_phone = re.compile('\d{3}-\d{3}-\d{4}')
+
+#With repair, common ID and phone variants are fixed first and the user is only prompted for values that can't be repaired
+def processFile(fName, repair=False):
 
     #Initialize dictionary to store employees' information
     person_dictionary = dict()
@@ -59,14 +70,24 @@ def processFile(fName):
             #Set middle initial to X if no middle initial; otherwise, set middle initial to capitalized version
             p_mi = 'X' if (not p_mi) else p_mi.capitalize()
 
+            if repair:
+                idStatus, repaired_id = normalizeId(p_id)
+                if idStatus == REPAIRED:
+                    print(f'ID {p_id} repaired to {repaired_id}')
+                    p_id = repaired_id
+                phoneStatus, repaired_phone = normalizePhone(p_phone)
+                if phoneStatus == REPAIRED:
+                    print(f'Phone {p_phone} repaired to {repaired_phone}')
+                    p_phone = repaired_phone
+
             #Keep prompting user to enter valid id if program detects invalid id
-            while not re.fullmatch(pattern_id, p_id):
+            while not PATTERN_ID.fullmatch(p_id):
                 print(f'ID invalid: {p_id}')
                 print('ID is two letters followed by 4 digits')
                 p_id = input('Please enter a valid ID: ')
 
             #Keep prompting user to enter valid phone number if program detects invalid phone number
-            while not re.fullmatch(pattern_phone, p_phone):
+            while not PATTERN_PHONE.fullmatch(p_phone):
                 print(f'Phone {p_phone} is invalid')
                 print('Phone number follows the form 123-456-7890')
                 p_phone = input('Please enter a valid phone number: ')
@@ -83,33 +104,54 @@ def processFile(fName):
 
 def main():
 
-    #Set initial file name
-    fileName = ''
+    parser = argparse.ArgumentParser(description='Parse a csv file of employee records')
+    parser.add_argument('fileName', nargs='?', default='')
+    parser.add_argument('--batch', action='store_true', help='stream the file without prompts; invalid rows go to the reject file')
+    parser.add_argument('--out', default='normalized.csv', help='output file of the valid rows in batch mode')
+    parser.add_argument('--rejects', default='rejects.csv', help='reject file of the invalid rows in batch mode')
+    parser.add_argument('--store', default=None, help='compact employee file (default: person_dictionary.bin; batch mode only writes it when given)')
+    parser.add_argument('--repair', action='store_true', help='rewrite common ID and phone variants to the required formats')
+    args = parser.parse_args()
 
     #Check if user provided a file path argument; otherwise, print error message and exit
-    if len(sys.argv) > 1:
-        fileName = sys.argv[1]
-    else:
+    fileName = args.fileName
+    if not fileName:
         print('Error: No argument provided')
         exit()
+
+    #Batch mode: stream the records and report the throughput instead of prompting and displaying them
+    #The compact employee file is opt-in, so batch mode keeps no per-record state by default
+    #With --store, records are spilled to a temporary file as they arrive and only their IDs and offsets stay in memory
+    if args.batch:
+        if args.store:
+            with PersonTable(spill=True) as table:
+                stats = ingestFile(fileName, args.out, args.rejects, onRecord=table.add, repair=args.repair)
+                table.save(args.store)
+        else:
+            stats = ingestFile(fileName, args.out, args.rejects, repair=args.repair)
+        print(stats.report())
+        print(f'\nValid rows saved to {args.out}' + (f' and {args.store}' if args.store else '') + f'; rejected rows saved to {args.rejects}')
+        return
+
+    storePath = args.store or 'person_dictionary.bin'
     
     #Save employees' information in a dictionary
-    person_dictionary = processFile(fileName)
+    person_dictionary = processFile(fileName, args.repair)
 
-    #Save dictionary to pickle file
-    print("\nSaved person_dictionary as pickle file\n")
-    pickle.dump(person_dictionary, open('person_dictionary.p', 'wb'))
+    #Save dictionary to the compact employee file
+    PersonTable(person.record() for person in person_dictionary.values()).save(storePath)
+    print(f"\nSaved person_dictionary as {storePath}\n")
 
-    #Load pickle file
-    print("Loaded pickle file\n")
-    input_dictionary = pickle.load(open('person_dictionary.p', 'rb'))
+    #Open the employee file; employees are only decoded when they are looked up
+    with PersonStore(storePath) as input_dictionary:
+        print("Loaded employee file\n")
     
-    #Display employee list; iterate through dictionary and call the display method
-    print("Employee list:")
+        #Display employee list; look up each employee by ID and call the display method
+        print("Employee list:")
 
-    for person in person_dictionary:
-        print("\n")
-        person_dictionary[person].display()
+        for p_id in person_dictionary:
+            print("\n")
+            Person(*input_dictionary[p_id]).display()
     
 
 if __name__ == '__main__':
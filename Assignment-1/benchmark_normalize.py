@@ -0,0 +1,77 @@
+#Benchmark for the ID and phone normalization engine
+#Generates a synthetic employee file with a mix of valid, repairable and invalid IDs and phone numbers,
+#then times batch ingestion with and without repair and the normalization functions on their own
+
+#Example call: python benchmark_normalize.py
+#Example call with a row amount: python benchmark_normalize.py 200000
+
+import os
+import sys
+import time
+import random
+import tempfile
+from ingest import HEADER, ingestFile
+from normalize import normalizeId, normalizePhone
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+#Phone formats the generator draws from; the last two can't be repaired
+PHONE_FORMATS = ['{}-{}-{}', '{}{}{}', '{}.{}.{}', '{} {} {}', '({}) {}-{}', '+1 {}-{}-{}', '{}-{}.{}', '{}-{}', '{}/{}/{}']
+
+#Return a random (ID, phone) pair; about half of the IDs are written in a repairable variant and a few are invalid
+def randomFields(rng):
+    letters = rng.choice(LETTERS) + rng.choice(LETTERS)
+    number = '%04d' % rng.randrange(10000)
+    variant = rng.random()
+    if variant < 0.5:
+        p_id = letters + number
+    elif variant < 0.8:
+        p_id = letters.lower() + number
+    elif variant < 0.95:
+        p_id = letters + '-' + number
+    else:
+        p_id = letters[0] + number #Missing letter; rejected
+
+    groups = ('%03d' % rng.randrange(1000), '%03d' % rng.randrange(1000), '%04d' % rng.randrange(10000))
+    phoneFormat = rng.choice(PHONE_FORMATS)
+    p_phone = phoneFormat.format(*groups[:phoneFormat.count('{}')])
+    return p_id, p_phone
+
+#Write a synthetic employee file with the given amount of rows
+def writeSyntheticFile(filePath, rowAmt, seed=0):
+    rng = random.Random(seed)
+    with open(filePath, 'w', encoding='utf-8') as f:
+        f.write(','.join(HEADER) + '\n')
+        for i in range(rowAmt):
+            p_id, p_phone = randomFields(rng)
+            f.write(f'smith,JOHN,{rng.choice(["", "q"])},{p_id},{p_phone}\n')
+
+#Time a function call; returns the result and the elapsed seconds
+def timeCall(func, *args, **kwargs):
+    start = time.perf_counter()
+    res = func(*args, **kwargs)
+    return res, time.perf_counter() - start
+
+def main():
+    rowAmt = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        dataPath = os.path.join(tmpDir, 'employees.csv')
+        _, genTime = timeCall(writeSyntheticFile, dataPath, rowAmt)
+        print(f'Generated {rowAmt} rows in {genTime:.2f} s ({os.path.getsize(dataPath) / 1e6:.1f} MB)\n')
+
+        for repair in (False, True):
+            stats = ingestFile(dataPath, os.path.join(tmpDir, 'out.csv'), os.path.join(tmpDir, 'rejects.csv'), repair=repair)
+            print('Ingestion ' + ('with' if repair else 'without') + ' repair:')
+            print(stats.report() + '\n')
+
+    #Normalization alone, without CSV parsing and writing
+    rng = random.Random(1)
+    fields = [randomFields(rng) for _ in range(min(rowAmt, 200000))]
+    _, idTime = timeCall(lambda: [normalizeId(p_id) for p_id, _ in fields])
+    _, phoneTime = timeCall(lambda: [normalizePhone(p_phone) for _, p_phone in fields])
+    print(f'normalizeId: {len(fields) / idTime:,.0f} values/s')
+    print(f'normalizePhone: {len(fields) / phoneTime:,.0f} values/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#Non-interactive batch ingestion of employee records
+#Rows are streamed from the CSV file with the csv module and checked with the same rules as Assignment-1.py
+#Valid rows are normalized and written to an output CSV; invalid rows go to a reject file with their reasons instead of prompting
+#With repair enabled, common ID and phone variants are rewritten to the required formats instead of rejected (see normalize.py)
+#Duplicate IDs are found with a bitmap over every possible ID (two letters followed by 4 digits), so memory stays bounded for any amount of rows
+
+import csv
+import time
+from collections import Counter
+from normalize import PATTERN_ID, PATTERN_PHONE, VALID, REPAIRED, REJECTED, normalizeFields
+
+HEADER = ['Last', 'First', 'Middle Initial', 'ID', 'Office phone']
+REJECT_HEADER = ['Line', 'Reason'] + HEADER
+
+#Amount of possible IDs: 26 * 26 letter pairs times 10000 numbers
+ID_SPACE = 26 * 26 * 10000
+
+#Map a valid ID to its position in the ID bitmap
+def idIndex(p_id):
+    return ((ord(p_id[0]) - 65) * 26 + ord(p_id[1]) - 65) * 10000 + int(p_id[2:])
+
+#IdSet remembers IDs in a bitmap of ID_SPACE bits (about 845 KB)
+class IdSet:
+    def __init__(self):
+        self.bits = bytearray((ID_SPACE + 7) // 8)
+
+    #Add an ID; returns True if it wasn't added before
+    def add(self, p_id):
+        idx = idIndex(p_id)
+        byte, mask = idx >> 3, 1 << (idx & 7)
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        return True
+
+#Normalize the name fields like processFile: capitalized names and X for a missing middle initial
+def normalizeNames(p_last, p_first, p_mi):
+    return p_last.capitalize(), p_first.capitalize(), 'X' if (not p_mi) else p_mi.capitalize()
+
+#Check one row; returns the status (valid, repaired or rejected), the normalized row and a list of reasons
+#Without repair, IDs and phone numbers must already be in the required formats
+def checkRow(row, seenIds, repair=False):
+    if len(row) != len(HEADER):
+        return REJECTED, None, ['wrong field count']
+
+    p_last, p_first, p_mi, p_id, p_phone = row
+    if repair:
+        status, p_id, p_phone, reasons = normalizeFields(p_id, p_phone)
+    else:
+        reasons = []
+        if not PATTERN_ID.fullmatch(p_id):
+            reasons.append('invalid id')
+        if not PATTERN_PHONE.fullmatch(p_phone):
+            reasons.append('invalid phone')
+        status = REJECTED if reasons else VALID
+
+    if not reasons and not seenIds.add(p_id):
+        status = REJECTED
+        reasons.append('duplicate id')
+    if reasons:
+        return status, None, reasons
+
+    return status, [*normalizeNames(p_last, p_first, p_mi), p_id, p_phone], reasons
+
+#IngestStats counts rows and reject reasons and reports the throughput
+class IngestStats:
+    def __init__(self):
+        self.rows = 0
+        self.accepted = 0
+        self.repaired = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        self.seconds = 0.0
+
+    def report(self):
+        rate = self.rows / self.seconds if self.seconds else 0.0
+        lines = [f'Rows read: {self.rows}',
+                 f'Accepted: {self.accepted} ({self.repaired} repaired)',
+                 f'Rejected: {self.rejected}']
+        lines += [f'  {reason}: {count}' for reason, count in self.reasons.most_common()]
+        lines.append(f'Time: {self.seconds:.2f} s ({rate:,.0f} rows/s)')
+        return '\n'.join(lines)
+
+#Stream a CSV file of employee records; valid rows are written to outPath and invalid rows to rejectPath
+#onRecord, if given, is called with every normalized row as well
+#Returns the IngestStats of the run
+def ingestFile(fName, outPath, rejectPath, onRecord=None, repair=False):
+    stats = IngestStats()
+    seenIds = IdSet()
+    start = time.perf_counter()
+
+    #utf-8-sig drops the byte order mark some spreadsheet exports start with
+    with open(fName, 'r', newline='', encoding='utf-8-sig') as f, \
+         open(outPath, 'w', newline='', encoding='utf-8') as out, \
+         open(rejectPath, 'w', newline='', encoding='utf-8') as rejects:
+        reader = csv.reader(f)
+        writer = csv.writer(out)
+        rejectWriter = csv.writer(rejects)
+        writer.writerow(HEADER)
+        rejectWriter.writerow(REJECT_HEADER)
+
+        #Skip the header line
+        next(reader, None)
+        for row in reader:
+            if not row:
+                continue
+            stats.rows += 1
+            status, record, reasons = checkRow(row, seenIds, repair)
+            if status == REJECTED:
+                stats.rejected += 1
+                stats.reasons.update(reasons)
+                rejectWriter.writerow([reader.line_num, '; '.join(reasons)] + row)
+                continue
+
+            stats.accepted += 1
+            if status == REPAIRED:
+                stats.repaired += 1
+            writer.writerow(record)
+            if onRecord is not None:
+                onRecord(record)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
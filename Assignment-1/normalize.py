@@ -0,0 +1,59 @@
+#Normalization engine for employee IDs and phone numbers
+#Each field is checked against the required format first; values that don't match go through one compiled pattern
+#that accepts the common variants and rebuilds the required format from its groups
+#Every field and row is classified as valid (already correct), repaired (rewritten to the required format) or rejected
+
+#Accepted phone variants: any mix of spaces, dots and hyphens between the groups, no separators, (555) area codes, and a leading +1 or 1
+#Accepted ID variants: lower-case letters, surrounding spaces, and a space or hyphen between the letters and digits
+#IDs with a missing letter or digit are rejected; padding them would guess at a different employee
+
+import re
+
+#Required formats: ID is two letters followed by 4 digits; phone number is 999-999-9999
+PATTERN_ID = re.compile(r'[A-Z]{2}\d{4}')
+PATTERN_PHONE = re.compile(r'\d{3}-\d{3}-\d{4}')
+
+VALID = 'valid'
+REPAIRED = 'repaired'
+REJECTED = 'rejected'
+
+PHONE_VARIANT = re.compile(r'\s*(?:\+?1[\s.-]*)?\(?(\d{3})\)?[\s.-]*(\d{3})[\s.-]*(\d{4})\s*')
+ID_VARIANT = re.compile(r'\s*([A-Za-z]{2})[\s-]?(\d{4})\s*')
+
+#Normalize a phone number; returns (status, value) with the original value if it was rejected
+def normalizePhone(p_phone):
+    if PATTERN_PHONE.fullmatch(p_phone):
+        return VALID, p_phone
+    match = PHONE_VARIANT.fullmatch(p_phone)
+    if match:
+        return REPAIRED, '-'.join(match.groups())
+    return REJECTED, p_phone
+
+#Normalize an ID; returns (status, value) with the original value if it was rejected
+def normalizeId(p_id):
+    if PATTERN_ID.fullmatch(p_id):
+        return VALID, p_id
+    match = ID_VARIANT.fullmatch(p_id)
+    if match:
+        return REPAIRED, match.group(1).upper() + match.group(2)
+    return REJECTED, p_id
+
+#Normalize the ID and phone of a row; returns (status, ID, phone, reasons)
+#The row is rejected if any field is rejected and repaired if any field was rewritten
+def normalizeFields(p_id, p_phone):
+    idStatus, p_id = normalizeId(p_id)
+    phoneStatus, p_phone = normalizePhone(p_phone)
+
+    reasons = []
+    if idStatus == REJECTED:
+        reasons.append('invalid id')
+    if phoneStatus == REJECTED:
+        reasons.append('invalid phone')
+
+    if reasons:
+        status = REJECTED
+    elif idStatus == REPAIRED or phoneStatus == REPAIRED:
+        status = REPAIRED
+    else:
+        status = VALID
+    return status, p_id, p_phone, reasons
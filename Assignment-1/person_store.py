@@ -0,0 +1,206 @@
+#Compact columnar storage for employee records
+#Records are kept as an ID key column, an offset column and one blob of encoded fields, instead of one Python object per employee
+#Saved files are opened with mmap and looked up by ID with a binary search, so only the requested employees are decoded
+
+#Layout (little-endian, sections aligned to 8 bytes):
+#  header: magic, version, record amount, key position, offsets position, blob position
+#  keys: uint32 ID keys (see ingest.idIndex) in ascending order
+#  offsets: uint64 offsets (record amount + 1) into the blob
+#  blob: UTF-8 records; the fields last, first, middle initial, ID and phone are separated by the unit separator character
+#        backslashes and unit separators inside a field are escaped (version 2)
+
+import os
+import re
+import sys
+import mmap
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from ingest import idIndex
+
+MAGIC = b'EMPL'
+VERSION = 2
+HEADER = struct.Struct('<4sIQQQQ')
+ALIGN = 8
+SEPARATOR = '\x1f'
+
+#Inside a field, a backslash is stored as two backslashes and the separator as a backslash followed by u
+ESCAPED_SEPARATOR = '\\u'
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+#Round a file position up to the section alignment
+def _align(pos):
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+#Convert an array to little-endian bytes
+def _toBytes(arr):
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+#Escape backslashes and separators inside a field, so a field can never split into two on reading
+def _escapeField(field):
+    if '\\' in field or SEPARATOR in field:
+        field = field.replace('\\', '\\\\').replace(SEPARATOR, ESCAPED_SEPARATOR)
+    return field
+
+#Undo _escapeField
+def _unescapeField(field):
+    if '\\' in field:
+        field = ESCAPE_PATTERN.sub(lambda m: SEPARATOR if m.group(1) == 'u' else m.group(1), field)
+    return field
+
+#PersonTable collects records in compact columns; records are (last, first, mi, id, phone) tuples
+#With spill=True the encoded records are written to an anonymous temporary file as they arrive,
+#so only the 4-byte key and 8-byte offset of each record stay in memory (used by batch ingestion)
+class PersonTable:
+    def __init__(self, records=(), spill=False):
+        self.keys = array('I')
+        self.offsets = array('Q', [0])
+        self.blob = tempfile.TemporaryFile() if spill else bytearray()
+        for record in records:
+            self.add(record)
+
+    #Append a record; IDs must be valid (two letters followed by 4 digits)
+    def add(self, record):
+        encoded = SEPARATOR.join(_escapeField(field) for field in record).encode('utf-8')
+        self.keys.append(idIndex(record[3]))
+        if isinstance(self.blob, bytearray):
+            self.blob += encoded
+        else:
+            self.blob.write(encoded)
+        self.offsets.append(self.offsets[-1] + len(encoded))
+
+    #Encoded bytes of the record at position i
+    def _encoded(self, i):
+        if isinstance(self.blob, bytearray):
+            return self.blob[self.offsets[i]:self.offsets[i + 1]]
+        self.blob.seek(self.offsets[i])
+        return self.blob.read(self.offsets[i + 1] - self.offsets[i])
+
+    def __len__(self):
+        return len(self.keys)
+
+    #Write the table to a file, sorted by ID; records are copied one at a time, so no second copy of the blob is built
+    #The file is written to a temporary path first and moved into place, so readers never see a partial file
+    def save(self, filePath):
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        keys = array('I', (self.keys[i] for i in order))
+        for i in range(1, len(keys)):
+            if keys[i] == keys[i - 1]:
+                raise ValueError('Duplicate ID in person table: ' + _keyToId(keys[i]))
+
+        offsets = array('Q', [0])
+        for i in order:
+            offsets.append(offsets[-1] + self.offsets[i + 1] - self.offsets[i])
+
+        keyPos = _align(HEADER.size)
+        offsetsPos = _align(keyPos + 4 * len(keys))
+        blobPos = _align(offsetsPos + 8 * len(offsets))
+
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filePath)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for pos, data in [(0, HEADER.pack(MAGIC, VERSION, len(keys), keyPos, offsetsPos, blobPos)),
+                                  (keyPos, _toBytes(keys)), (offsetsPos, _toBytes(offsets))]:
+                    f.seek(pos)
+                    f.write(data)
+                f.seek(blobPos)
+                for i in order:
+                    f.write(self._encoded(i))
+            os.chmod(tmpPath, 0o644)
+            os.replace(tmpPath, filePath)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+
+    #Remove the spill file
+    def close(self):
+        if not isinstance(self.blob, bytearray):
+            self.blob.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#Convert an ID key back to the ID string
+def _keyToId(key):
+    letters, number = divmod(key, 10000)
+    return chr(65 + letters // 26) + chr(65 + letters % 26) + '%04d' % number
+
+#Memory-mapped person file; records are decoded on lookup
+class PersonStore:
+    def __init__(self, filePath):
+        self.filePath = filePath
+        with open(filePath, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.buffer)
+
+        magic, version, amount, keyPos, offsetsPos, blobPos = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(filePath + ' is not a person file')
+        if version != VERSION:
+            raise ValueError('Unsupported person file version: ' + str(version))
+
+        self.keys = view[keyPos:keyPos + 4 * amount].cast('I')
+        self.offsets = view[offsetsPos:offsetsPos + 8 * (amount + 1)].cast('Q')
+        self.blob = view[blobPos:blobPos + self.offsets[amount]]
+
+    #Position of an ID in the key column, or None
+    def _find(self, p_id):
+        try:
+            key = idIndex(p_id)
+        except (ValueError, IndexError, TypeError):
+            return None #Not a valid ID, so it can't be stored
+        idx = bisect_left(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            return idx
+        return None
+
+    def _record(self, idx):
+        fields = self.blob[self.offsets[idx]:self.offsets[idx + 1]].tobytes().decode('utf-8').split(SEPARATOR)
+        return tuple(_unescapeField(field) for field in fields)
+
+    #Return the (last, first, mi, id, phone) record of an ID, or default if the ID isn't stored
+    def get(self, p_id, default=None):
+        idx = self._find(p_id)
+        return default if idx is None else self._record(idx)
+
+    def __getitem__(self, p_id):
+        idx = self._find(p_id)
+        if idx is None:
+            raise KeyError(p_id)
+        return self._record(idx)
+
+    def __contains__(self, p_id):
+        return self._find(p_id) is not None
+
+    def __len__(self):
+        return len(self.keys)
+
+    #Iterate over the stored IDs in ascending order
+    def __iter__(self):
+        for key in self.keys:
+            yield _keyToId(key)
+
+    #Iterate over (ID, record) pairs in ascending ID order
+    def items(self):
+        for idx, key in enumerate(self.keys):
+            yield _keyToId(key), self._record(idx)
+
+    def close(self):
+        self.keys = self.offsets = self.blob = None
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass #Views handed out to callers are still alive; the mapping is released once they are collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -10,13 +10,25 @@
 #Note: Default nltk POS tagging sometimes generate incorrect tags; hence, there might be some adjectives in the noun list
 
 #Example program call: python Assignment-2.py anat19.txt
+#Large corpora can be streamed in chunks and preprocessed by a process pool: python Assignment-2.py corpus.txt --workers 4
+#Reuse POS tags cached by earlier runs: python Assignment-2.py anat19.txt --tag-cache
 
+import os
 import sys
-import nltk
+import argparse
 from random import randint
-from nltk import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from noun_frequency import NounFrequency
+from tag_cache import TagCache, DEFAULT_DB_PATH
+
+#Shared NLP resources live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import wordTokens, stopWords, lemmatize, posTag, ensureResources
+
+
+#Amount of most common nouns that are printed and used in the word game
+TOP_NOUN_AMT = 50
 
 
 #readFile reads a file and returns the data
@@ -29,7 +41,7 @@ def readFile(filePath):
 
 #findLexicalDiversity computes the lexical diversity of the tokenized text
 def findLexicalDiversity(text):
-    tokens = word_tokenize(text)
+    tokens = wordTokens(text)
     return len(set(tokens))/ len(tokens)
 
 #findCharOccurrences finds all the occurences of a character in a string
@@ -41,51 +53,113 @@ def findCharOccurrences(s, ch):
 
 #preprocessText performs preprocessing on the raw text
 #Returns a tuple of tokens and nouns
-def preprocessText(text):
-    wnl = WordNetLemmatizer()
-    stop_words = set(stopwords.words('english'))
+#The stopword set and lemmatizer are shared and loaded once (see nlp_resources.py)
+#With a tag cache, only lemmas that weren't tagged in an earlier run are sent to the tagger (see tag_cache.py)
+def preprocessText(text, tagCache=None):
+    stop_words = stopWords()
 
-    tokens = word_tokenize(text.lower()) #tokenize lower-case raw text
+    tokens = wordTokens(text.lower()) #tokenize lower-case raw text
 
     #Keep tokens that are alpha, have length > 5, and not in the NLTK stopword list
     filtered_tokens = [t for t in tokens if t.isalpha() and len(t) > 5 and t not in stop_words]
 
     #Lemmatize the tokens; apply set and list operations to make a list of unique lemmas
-    lemmas = list(set([wnl.lemmatize(t) for t in filtered_tokens]))
+    lemmas = list(set([lemmatize(t) for t in filtered_tokens]))
 
     #Apply POS tagging to the unique lemmas
-    tags = nltk.pos_tag(lemmas)
+    tags = tagCache.tag(lemmas, posTag) if tagCache is not None else posTag(lemmas)
+
+    #Create a list of lemmas that are nouns
+    noun_list = [tup[0] for tup in tags if tup[1].startswith("N")]
+    printPreprocessReport(tags, len(tokens), len(noun_list))
 
-    #Print the first 20 tags
+    return tokens, noun_list
+
+#printPreprocessReport prints the first 20 tags and the number of tokens and nouns
+def printPreprocessReport(tags, tokenAmt, nounAmt):
     print("\nFirst 20 tags:")
     for tag_tuple in tags[:20]:
         print(tag_tuple)
 
-    #Create a list of lemmas that are nouns
-    noun_list = [tup[0] for tup in tags if tup[1].startswith("N")]
-
-    #Print the number of tokens and nouns
     print("\nToken and noun count:")
-    print("Number of tokens:", len(tokens))
-    print("Number of nouns:", len(noun_list))
+    print("Number of tokens:", tokenAmt)
+    print("Number of nouns:", nounAmt)
 
-    return tokens, noun_list
 
+#readChunks streams a file in chunks of about chunkSize characters
+#Chunks end at a blank line so paragraphs (and their sentences) stay whole; without blank lines they end at a line break after 2 * chunkSize
+def readChunks(filePath, chunkSize):
+    with open(filePath, 'r') as f:
+        lines = []
+        size = 0
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            if (size >= chunkSize and not line.strip()) or size >= 2 * chunkSize:
+                yield "".join(lines)
+                lines = []
+                size = 0
+        if lines:
+            yield "".join(lines)
+
+#processChunk tokenizes and lemmatizes one chunk the same way as findLexicalDiversity and preprocessText; runs in a worker process
+#Returns the distinct original-case tokens, their amount, the lower-case token counts and the set of lemmas
+def processChunk(chunk):
+    stop_words = stopWords()
+    caseTokens = wordTokens(chunk)
+    tokenCounts = Counter(wordTokens(chunk.lower())) #tokenize lower-case raw text, as in preprocessText
+
+    #Same filter as preprocessText: alpha, length > 5, and not in the NLTK stopword list
+    lemmas = set(lemmatize(t) for t in tokenCounts if t.isalpha() and len(t) > 5 and t not in stop_words)
+    return set(caseTokens), len(caseTokens), tokenCounts, lemmas
+
+#preprocessCorpus streams a file through processChunk in a process pool and merges the results
+#At most 2 chunks per worker are in flight, so memory stays bounded by the chunk size and the vocabulary
+#The unique lemmas of the whole file are POS tagged in one call, as in preprocessText; with a tag cache, only uncached lemmas are tagged
+#Returns the lexical diversity, the lower-case token counts and the list of nouns
+def preprocessCorpus(filePath, workers, chunkSize=1 << 20, tagCache=None):
+    distinctTokens = set()
+    caseAmt = 0
+    tokenCounts = Counter()
+    lemmas = set()
+
+    def merge(future):
+        nonlocal caseAmt
+        chunkTokens, chunkAmt, chunkCounts, chunkLemmas = future.result()
+        distinctTokens.update(chunkTokens)
+        caseAmt += chunkAmt
+        tokenCounts.update(chunkCounts)
+        lemmas.update(chunkLemmas)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk in readChunks(filePath, chunkSize):
+            pending.append(executor.submit(processChunk, chunk))
+            if len(pending) >= 2 * workers:
+                merge(pending.pop(0))
+        for future in pending:
+            merge(future)
 
+    #Apply POS tagging to the unique lemmas
+    lemmas = list(lemmas)
+    tags = tagCache.tag(lemmas, posTag) if tagCache is not None else posTag(lemmas)
+
+    noun_list = [tup[0] for tup in tags if tup[1].startswith("N")]
+    printPreprocessReport(tags, sum(tokenCounts.values()), len(noun_list))
+
+    return len(distinctTokens) / caseAmt, tokenCounts, noun_list
 
-#createNounDict creates a dictionary of {noun: count of noun in tokens} items
-#Function sorts the dictionary by count and returns a dictionary
-def createNounDict(tokens, noun_list):
 
-    #Initialize a dictionary with noun keys and default values of 0
-    noun_dict = dict.fromkeys(noun_list, 0)
 
-    #Iterate through token list and increment noun frequency
-    for token in tokens:
-        if token in noun_dict.keys():
-            noun_dict[token] += 1
+#createNounDict creates a dictionary of {noun: count of noun in tokens} items
+#Function sorts the dictionary by count and returns a dictionary; only the k most frequent nouns are kept if k is given
+#Tokens are counted in one pass and the top k are selected with a heap (see noun_frequency.py)
+def createNounDict(tokens, noun_list, k=None):
+    return dict(NounFrequency(noun_list).update(tokens).topK(k))
 
-    return dict(sorted(noun_dict.items(), key=lambda x:x[1], reverse=True))
+#createNounDictFromCounts is createNounDict for token counts that were already merged by preprocessCorpus
+def createNounDictFromCounts(tokenCounts, noun_list, k=None):
+    return dict(NounFrequency(noun_list).updateCounts(tokenCounts).topK(k))
 
 #playWordGame initiates a word guessing game
 #Random word is selected from a list of 50 common nouns
@@ -187,32 +261,54 @@ def playWordGame(noun_list):
 def main():
 
     #Set file path to Python script argument
-    filePath = ""
-    if len(sys.argv) > 1:
-        filePath = sys.argv[1]
-    else:
+    parser = argparse.ArgumentParser(description="Extract nouns from a text file and play a word guessing game")
+    parser.add_argument("filePath", nargs="?", default="")
+    parser.add_argument("--workers", type=int, default=0, help="stream the file in chunks through this many processes")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20, help="characters per chunk when streaming")
+    parser.add_argument("--tag-cache", action="store_true", help="reuse POS tags of lemmas from earlier runs")
+    parser.add_argument("--tag-cache-path", default=DEFAULT_DB_PATH, help="SQLite file of the POS tag cache (default: next to this script)")
+    args = parser.parse_args()
+
+    filePath = args.filePath
+    if not filePath:
         print("Error: Missing file path")
         exit()    
 
-    #Parse text 
-    text = readFile(filePath)
+    #Stop right away if any NLTK data used below is missing
+    ensureResources("punkt", "stopwords", "wordnet", "tagger")
+
+    #Opt-in: POS tags of lemmas seen in earlier runs are reused, so tags can differ from a run without the cache
+    tagCache = TagCache(args.tag_cache_path) if args.tag_cache else None
+
+    if args.workers > 0:
+        #Tokenize and lemmatize each chunk in the process pool
+        diversity, tokenCounts, noun_list = preprocessCorpus(filePath, args.workers, args.chunk_size, tagCache=tagCache)
+        print("\nLexical diversity: %.2f" % diversity)
+        sorted_dict = createNounDictFromCounts(tokenCounts, noun_list, TOP_NOUN_AMT)
+    else:
+        #Parse text 
+        text = readFile(filePath)
+
+        #Print lexical diversity, formatted to 2 decimal places    
+        print("Lexical diversity: %.2f\n" % findLexicalDiversity(text))    
 
-    #Print lexical diversity, formatted to 2 decimal places    
-    print("Lexical diversity: %.2f\n" % findLexicalDiversity(text))    
+        #Unpack lists of tokens and nouns
+        tokens, noun_list = preprocessText(text, tagCache)
 
-    #Unpack lists of tokens and nouns
-    tokens, noun_list = preprocessText(text)
+        #Create a sorted dictionary of nouns
+        sorted_dict = createNounDict(tokens, noun_list, TOP_NOUN_AMT)
 
-    #Create a sorted dictionary of nouns
-    sorted_dict = createNounDict(tokens, noun_list)
+    if tagCache is not None:
+        print("\nPOS tag cache:", tagCache.stats())
+        tagCache.close()
     
     #Print 50 nouns with the highest word count
     print("\n50 most common nouns and their counts:")
-    for key, val in list(sorted_dict.items())[:50]:
+    for key, val in sorted_dict.items():
         print(key+": "+str(val)) 
 
     #Create a list of 50 nouns
-    noun_list = [key for key,val in list(sorted_dict.items())[:50]]
+    noun_list = list(sorted_dict)
 
     #Start word game
     playWordGame(noun_list)
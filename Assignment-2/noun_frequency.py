@@ -0,0 +1,46 @@
+#Noun frequency engine for Assignment-2
+#Counts how often each noun occurs in the tokens; tokens are counted in one pass and only nouns are kept
+#The k most frequent nouns are selected with a heap in O(n log k) instead of sorting every noun
+#Counts can be updated from a stream of token batches or from token counts that were already merged
+
+import heapq
+from collections import Counter
+
+class NounFrequency:
+    def __init__(self, noun_list):
+        #Nouns start at 0 in list order; ties in topK keep this order, like the sorted dictionary of createNounDict
+        self.counts = dict.fromkeys(noun_list, 0)
+        self.tokenAmt = 0
+
+    #Count a batch of tokens
+    def update(self, tokens):
+        tokenCounts = Counter(tokens)
+        self.tokenAmt += sum(tokenCounts.values())
+        self.updateCounts(tokenCounts, countTokens=False)
+        return self
+
+    #Add token counts, e.g. a Counter merged from several chunks
+    def updateCounts(self, tokenCounts, countTokens=True):
+        if countTokens:
+            self.tokenAmt += sum(tokenCounts.values())
+        #Walk the smaller side; both are dictionaries, so each lookup is O(1)
+        if len(tokenCounts) < len(self.counts):
+            for token, count in tokenCounts.items():
+                if token in self.counts:
+                    self.counts[token] += count
+        else:
+            for noun in self.counts:
+                self.counts[noun] += tokenCounts.get(noun, 0)
+        return self
+
+    #Return the k most frequent (noun, count) pairs, highest count first; all nouns if k is None
+    def topK(self, k=None):
+        if k is None or k >= len(self.counts):
+            return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        return heapq.nlargest(k, self.counts.items(), key=lambda x: x[1])
+
+    def __getitem__(self, noun):
+        return self.counts[noun]
+
+    def __len__(self):
+        return len(self.counts)
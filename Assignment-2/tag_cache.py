@@ -0,0 +1,81 @@
+#Persistent POS tag cache keyed by lemma
+#Tags are kept in a small SQLite table between runs; only lemmas that aren't cached are sent to the tagger, in one batch
+#The least recently used lemmas are evicted once the cache holds more than maxEntries lemmas
+#Note: a cached lemma keeps the tag it got the first time, while tagging the whole lemma list lets neighbouring lemmas change a tag
+
+import os
+import time
+import sqlite3
+
+#Cache file next to this module, so runs from any directory share it and nothing is written to the working directory
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pos_tag_cache.db")
+
+#SQLite limits the amount of parameters in one statement
+QUERY_BATCH = 500
+
+class TagCache:
+    def __init__(self, dbPath=DEFAULT_DB_PATH, maxEntries=200000):
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(dbPath)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tags (
+                               lemma TEXT PRIMARY KEY,
+                               tag TEXT NOT NULL,
+                               accessed_at REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS tags_accessed ON tags(accessed_at)")
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #Return the cached tags of the given lemmas as a dictionary
+    def lookup(self, lemmas):
+        found = {}
+        for start in range(0, len(lemmas), QUERY_BATCH):
+            batch = lemmas[start:start + QUERY_BATCH]
+            query = "SELECT lemma, tag FROM tags WHERE lemma IN (" + ",".join("?" * len(batch)) + ")"
+            found.update(self.db.execute(query, batch))
+        return found
+
+    #Tag a list of lemmas; returns (lemma, tag) tuples in input order like nltk.pos_tag
+    #tagger is called once with the lemmas that weren't cached
+    def tag(self, lemmas, tagger):
+        lemmas = list(lemmas)
+        tags = self.lookup(lemmas)
+        missing = [lemma for lemma in lemmas if lemma not in tags]
+        self.hits += len(lemmas) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            tags.update(tagger(missing))
+
+        #Store new tags and mark every used lemma as recently used
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?, ?)", ((lemma, tags[lemma], now) for lemma in lemmas))
+        self.evict()
+
+        return [(lemma, tags[lemma]) for lemma in lemmas]
+
+    #Remove least recently used lemmas until the cache fits in maxEntries
+    def evict(self):
+        excess = len(self) - self.maxEntries
+        if excess > 0:
+            with self.db:
+                self.db.execute("DELETE FROM tags WHERE lemma IN (SELECT lemma FROM tags ORDER BY accessed_at LIMIT ?)", (excess,))
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+
+    #Hit and miss counters of this run
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0, "entries": len(self)}
+
+    def close(self):
+        self.db.close()
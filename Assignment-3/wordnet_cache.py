@@ -0,0 +1,194 @@
+#Cached WordNet and SentiWordNet lookups for the Assignment-3 notebook
+#Hypernym paths, depths and ancestor distances are computed once per synset and kept in LRU caches,
+#so Wu-Palmer similarities of many synset pairs don't walk the WordNet graph again for every pair
+#Wu-Palmer similarity and Lesk follow NLTK's wup_similarity and nltk.wsd.lesk, including the simulated root for verbs
+#Batch APIs build pairwise similarity matrices and score the sentiment of many sentences
+
+#Example use in the notebook:
+#  from wordnet_cache import WordNetCache
+#  cache = WordNetCache()
+#  cache.similarityMatrix([wn.synset('tree.n.01'), wn.synset('forest.n.01')])
+#  cache.sentenceSentiments(["The story had a happy ending"])
+#Note: Must install nltk via pip and download the wordnet and sentiwordnet corpora; a missing corpus raises nlp_resources.MissingResourceError
+
+import os
+import sys
+from functools import lru_cache
+
+#Shared NLP resources live in the repository root; the corpora are checked and loaded there on first use
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import wordnet as loadWordnet, sentiwordnet as loadSentiwordnet
+
+#Stand-in for the fake root NLTK adds above the separate verb taxonomies; compares equal to NLTK's own fake root
+class _Root:
+    _name = '*ROOT*'
+
+    def name(self):
+        return self._name
+
+    def __eq__(self, other):
+        return getattr(other, '_name', None) == self._name
+
+    def __hash__(self):
+        return hash(self._name)
+
+    def __repr__(self):
+        return "Synset('*ROOT*')"
+
+ROOT = _Root()
+
+#Hypernyms of a synset, including instance hypernyms, like NLTK's traversals
+def _parents(synset):
+    return synset.hypernyms() + synset.instance_hypernyms()
+
+class WordNetCache:
+    def __init__(self, wordnet=None, sentiwordnet=None, cacheSize=65536):
+        self.wn = loadWordnet() if wordnet is None else wordnet
+        self._swn = sentiwordnet
+
+        #Every cache holds at most cacheSize entries and drops the least recently used ones
+        self.synsets = lru_cache(maxsize=cacheSize)(self._synsets)
+        self.hypernymPaths = lru_cache(maxsize=cacheSize)(self._hypernymPaths)
+        self.hypernymChain = lru_cache(maxsize=cacheSize)(self._hypernymChain)
+        self.distances = lru_cache(maxsize=cacheSize)(self._distances)
+        self.wupSimilarity = lru_cache(maxsize=cacheSize)(self._wupSimilarity)
+        self.definitionWords = lru_cache(maxsize=cacheSize)(self._definitionWords)
+        self.sentiScores = lru_cache(maxsize=cacheSize)(self._sentiScores)
+
+    #SentiWordNet is loaded when it is first needed
+    @property
+    def swn(self):
+        if self._swn is None:
+            self._swn = loadSentiwordnet()
+        return self._swn
+
+    #Synsets of a word as a tuple; pos is a WordNet POS such as 'n' or 'v'
+    def _synsets(self, word, pos=None):
+        return tuple(self.wn.synsets(word, pos))
+
+    #All paths from a root to the synset, as tuples of synsets
+    def _hypernymPaths(self, synset):
+        parents = _parents(synset)
+        if not parents:
+            return ((synset,),)
+        return tuple(path + (synset,) for parent in parents for path in self.hypernymPaths(parent))
+
+    #Chain of first hypernyms from the synset up to the root, like the notebook's hypernyms()[0] loop
+    def _hypernymChain(self, synset):
+        hypernyms = synset.hypernyms()
+        if not hypernyms:
+            return ()
+        return (hypernyms[0],) + self.hypernymChain(hypernyms[0])
+
+    #Shortest and longest distance from the synset to a root
+    def minDepth(self, synset):
+        return 0 if synset is ROOT else min(len(path) for path in self.hypernymPaths(synset)) - 1
+
+    def maxDepth(self, synset):
+        return 0 if synset is ROOT else max(len(path) for path in self.hypernymPaths(synset)) - 1
+
+    #Dictionary of ancestor: shortest upward distance, including the synset itself at 0
+    #With simulateRoot the fake root is added one step above the farthest ancestor, as in NLTK
+    def _distances(self, synset, simulateRoot=False):
+        if synset is ROOT:
+            return {ROOT: 0}
+        dist = {}
+        for path in self.hypernymPaths(synset):
+            last = len(path) - 1
+            for i, ancestor in enumerate(path):
+                if last - i < dist.get(ancestor, last + 1):
+                    dist[ancestor] = last - i
+        if simulateRoot:
+            dist[ROOT] = max(dist.values()) + 1
+        return dist
+
+    #Length of the shortest path between two synsets through a common ancestor; None if they aren't connected
+    def pathDistance(self, synset1, synset2, simulateRoot=False):
+        if synset1 == synset2:
+            return 0
+        dist1 = self.distances(synset1, simulateRoot)
+        dist2 = self.distances(synset2, simulateRoot)
+        common = [dist1[s] + dist2[s] for s in dist1.keys() & dist2.keys()]
+        return min(common) if common else None
+
+    #Wu-Palmer similarity of two synsets; same result as synset1.wup_similarity(synset2)
+    def _wupSimilarity(self, synset1, synset2, simulateRoot=True):
+        needRoot = simulateRoot and (synset1._needs_root() or synset2._needs_root())
+        common = self.distances(synset1, needRoot).keys() & self.distances(synset2, needRoot).keys()
+        if not common:
+            return None
+
+        #Lowest common hypernyms by minimum depth; ties go to synset1 itself, then to the first name
+        deepest = max(self.minDepth(s) for s in common)
+        subsumers = [s for s in common if self.minDepth(s) == deepest]
+        subsumer = synset1 if synset1 in subsumers else min(subsumers, key=lambda s: s.name())
+
+        depth = self.maxDepth(subsumer) + 1
+        len1 = self.pathDistance(synset1, subsumer, needRoot)
+        len2 = self.pathDistance(synset2, subsumer, needRoot)
+        if len1 is None or len2 is None:
+            return None
+        return (2.0 * depth) / (len1 + len2 + 2 * depth)
+
+    #Matrix of Wu-Palmer similarities; rows are synsets1, columns synsets2 (synsets1 again if not given)
+    def similarityMatrix(self, synsets1, synsets2=None):
+        synsets2 = synsets1 if synsets2 is None else synsets2
+        return [[self.wupSimilarity(s1, s2) for s2 in synsets2] for s1 in synsets1]
+
+    #Matrix of word similarities: the highest Wu-Palmer similarity between any senses of the two words (0 if none)
+    def wordSimilarityMatrix(self, words1, words2=None, pos=None):
+        words2 = words1 if words2 is None else words2
+        matrix = []
+        for w1 in words1:
+            row = []
+            for w2 in words2:
+                scores = [self.wupSimilarity(s1, s2) for s1 in self.synsets(w1, pos) for s2 in self.synsets(w2, pos)]
+                row.append(max((s for s in scores if s is not None), default=0.0))
+            matrix.append(row)
+        return matrix
+
+    #Set of the words in a synset's definition
+    def _definitionWords(self, synset):
+        return frozenset(synset.definition().split())
+
+    #Simplified Lesk like nltk.wsd.lesk: the sense whose definition shares the most words with the context
+    def lesk(self, context, word, pos=None):
+        context = set(context)
+        synsets = [ss for ss in self.synsets(word) if not pos or str(ss.pos()) == pos]
+        if not synsets:
+            return None
+        return max(synsets, key=lambda ss: len(context & self.definitionWords(ss)))
+
+    #Disambiguate every token of a tokenized sentence against the sentence; returns (token, sense) pairs
+    def leskAll(self, tokens, pos=None):
+        return [(token, self.lesk(tokens, token, pos)) for token in tokens]
+
+    #(positive, negative, objective) scores of a token's first SentiWordNet sense, or None, like the notebook
+    def _sentiScores(self, token):
+        for sentiSynset in self.swn.senti_synsets(token):
+            return sentiSynset.pos_score(), sentiSynset.neg_score(), sentiSynset.obj_score()
+        return None
+
+    #Sum the scores of the tokens of one sentence; strings are split on white space like the notebook
+    def sentenceSentiment(self, tokens):
+        if isinstance(tokens, str):
+            tokens = tokens.split()
+        pos = neg = obj = 0.0
+        scored = 0
+        for token in tokens:
+            scores = self.sentiScores(token)
+            if scores:
+                pos += scores[0]
+                neg += scores[1]
+                obj += scores[2]
+                scored += 1
+        return {"pos": pos, "neg": neg, "obj": obj, "scored": scored, "polarity": pos - neg}
+
+    #Score many sentences; repeated tokens are looked up once
+    def sentenceSentiments(self, sentences):
+        return [self.sentenceSentiment(tokens) for tokens in sentences]
+
+    #Hit and miss counters of each cache
+    def cacheInfo(self):
+        return {name: getattr(self, name).cache_info() for name in
+                ["synsets", "hypernymPaths", "hypernymChain", "distances", "wupSimilarity", "definitionWords", "sentiScores"]}
@@ -1,15 +1,31 @@
 
 #This program reads in corpuses of the English, French, and Italian languages; generates unigram and bigram dictionaries; and save them as pickle files
-#Builds language models of English, French, and Italian
+#Builds a language model for every data/LangId.train.<language> file (English, French, and Italian in this repository)
 #Run this script before program 2
-#Takes 6 - 7 minutes to finish program execution
+#Saves the pickled dictionaries plus data/langid_model.bin, the compact memory-mapped model read by program 2
+#N-grams are counted in a single pass (see ngram_counts.py), so run time is dominated by tokenization
+#Run benchmark_ngrams.py to compare against the original count()-based implementation
 
 #Example call: python Program-1.py
+#Parallel training example call: python Program-1.py --workers 4
+#With --workers, each corpus is split into sentence shards that are tokenized and counted in a process pool
+#Incremental training example call: python Program-1.py --update French new_french.txt
+#With --update, only the new text is counted and merged into the existing tables of that language
 
-from nltk import word_tokenize
-from nltk.util import ngrams
+import os
+import sys
+import glob
+import tempfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from ngram_counts import countNGrams, NGramCounter
+from ngram_model import saveCompactModel, convertPickles, pickleLanguages
 import pickle
 
+#Shared NLP resources live in the repository root; NLTK is only imported when text is tokenized
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import wordTokens as word_tokenize, sentences as sent_tokenize, ensureResources
+
 #readFile reads a file and returns the data
 def readFile(filePath):
     data = ""
@@ -21,48 +37,136 @@ def readFile(filePath):
 #Create unigram and bigram dictionaries of the text; items are unigram/bigram: amount of unigram/bigram in corpus
 def createGramDicts(text):
     tokens = word_tokenize(text)
-    unigrams = list(ngrams(tokens, 1))
-    bigrams = list(ngrams(tokens, 2))
 
-    unigram_dict = {t:unigrams.count(t) for t in set(unigrams)}
-    bigram_dict = {b:bigrams.count(b) for b in set(bigrams)}
+    #Count each table in one pass over the tokens
+    unigram_dict = dict(countNGrams(tokens, 1))
+    bigram_dict = dict(countNGrams(tokens, 2))
 
     return unigram_dict, bigram_dict
 
+#Split the text into shards of whole sentences
+#word_tokenize splits sentences before tokenizing them, so tokenizing the shards gives the same tokens as the full text
+def createSentenceShards(text, shardAmt):
+    sentences = sent_tokenize(text)
+    shardSize = max(1, -(-len(sentences) // shardAmt)) #Ceiling division
+    return [sentences[i:i+shardSize] for i in range(0, len(sentences), shardSize)]
+
+#Tokenize and count one shard of sentences; runs inside a worker process
+def countShard(sentences):
+    counter = NGramCounter((1, 2))
+    for sent in sentences:
+        counter.update(word_tokenize(sent, preserve_line=True)) #Sentence was already split, so skip the sentence tokenizer
+    return counter
+
+#Train several languages at once; shards of every corpus share one process pool
+#Shard counts are merged in their original order, so bigrams across shard boundaries are kept
+#Returns a dictionary of language: (unigram dictionary, bigram dictionary)
+def createGramDictsParallel(textDict, workers, shardsPerText=None):
+    shardsPerText = shardsPerText or workers
+    gramDicts = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {lang: [executor.submit(countShard, shard) for shard in createSentenceShards(text, shardsPerText)]
+                   for lang, text in textDict.items()}
+
+        for lang, shardFutures in futures.items():
+            counter = NGramCounter((1, 2))
+            for future in shardFutures:
+                counter.merge(future.result())
+            gramDicts[lang] = (counter.gramDict(1), counter.gramDict(2))
+
+    return gramDicts
+
 #Save pickle files
+#Written to a temporary file and moved into place, so a reader never sees a partially written model
 def savePickleFile(dict, fileName):
-    pickle.dump(dict, open(fileName, 'wb'))
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fileName)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(dict, f)
+        os.chmod(tmpPath, 0o644)
+        os.replace(tmpPath, fileName)
+    except BaseException:
+        os.remove(tmpPath)
+        raise
+
+#Load a pickle file; returns an empty dictionary if the model doesn't exist yet
+def loadPickleFile(fileName):
+    if not os.path.exists(fileName):
+        return {}
+    with open(fileName, 'rb') as f:
+        return pickle.load(f)
+
+#Add the counts of one dictionary into another
+def mergeGramDict(gram_dict, new_dict):
+    for gram, count in new_dict.items():
+        gram_dict[gram] = gram_dict.get(gram, 0) + count
+    return gram_dict
+
+#updateLanguage counts new text for one language and merges it into that language's existing tables
+#Tokenizing and counting cost grows with the new text, not the whole corpus; only the changed language's pickles are rewritten
+#The compact model is still rewritten in full when it exists: every language shares one sorted vocabulary, so a new token
+#shifts the ids in every language's tables and no section can be patched in place. Rewriting it here keeps Program-2's
+#fast path valid; the rewrite is one pass over the stored counts, which is small next to retokenizing the corpora
+def updateLanguage(lang, filePath, workers=1, dataDir="data", shards=None):
+    text = readFile(filePath)
+    if workers > 1:
+        ugram_new, bigram_new = createGramDictsParallel({lang: text}, workers, shards)[lang]
+    else:
+        ugram_new, bigram_new = createGramDicts(text)
+
+    ugramPath = os.path.join(dataDir, "ugram_dict_"+lang+".p")
+    bigramPath = os.path.join(dataDir, "bigram_dict_"+lang+".p")
+    ugram_dict = mergeGramDict(loadPickleFile(ugramPath), ugram_new)
+    bigram_dict = mergeGramDict(loadPickleFile(bigramPath), bigram_new)
+
+    savePickleFile(ugram_dict, ugramPath)
+    savePickleFile(bigram_dict, bigramPath)
+
+    modelPath = os.path.join(dataDir, "langid_model.bin")
+    if os.path.exists(modelPath):
+        convertPickles(pickleLanguages(dataDir), dataDir, modelPath)
+
+    print("Updated " + lang + ": " + str(sum(ugram_new.values())) + " new tokens, " + str(len(ugram_dict)) + " unigrams, " + str(len(bigram_dict)) + " bigrams")
  
 
 def main():  
+    parser = argparse.ArgumentParser(description="Build unigram and bigram language models")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes used for training")
+    parser.add_argument("--shards", type=int, default=None, help="Shards per corpus in parallel mode (default: one per worker)")
+    parser.add_argument("--update", nargs=2, metavar=("LANGUAGE", "FILE"), help="Merge the counts of FILE into the existing LANGUAGE model")
+    args = parser.parse_args()
+
+    #Stop right away if the tokenizer data is missing
+    ensureResources("punkt")
+
+    #Incremental mode: only count the new text
+    if args.update:
+        updateLanguage(args.update[0], args.update[1], args.workers, shards=args.shards)
+        return
     
-    #Specify filepaths
-    filePath1 = "data/LangId.train.English"
-    filePath2 = "data/LangId.train.French"
-    filePath3 = "data/LangId.train.Italian"
+    #Train every language with a data/LangId.train.<language> file, so a new language only needs its training file
+    filePaths = sorted(glob.glob("data/LangId.train.*"))
+    if not filePaths:
+        print("Error: No training files data/LangId.train.<language> found")
+        exit()
 
-    #Read files
-    text1 = readFile(filePath1)
-    text2 = readFile(filePath2)
-    text3 = readFile(filePath3)
+    #Read files; the language is the last part of the file name
+    textDict = {filePath.split(".")[-1]: readFile(filePath) for filePath in filePaths}
 
     #Unpack unigram and bigram dictionaries
-    ugram_1, bigram_1 = createGramDicts(text1)
-    ugram_2, bigram_2 = createGramDicts(text2)
-    ugram_3, bigram_3 = createGramDicts(text3)
-
-    #Split the file path into an array of strings with a delimitter
-    fileParts_1 = filePath1.split(".")
-    fileParts_2 = filePath2.split(".")
-    fileParts_3 = filePath3.split(".")
+    if args.workers > 1:
+        gramDicts = createGramDictsParallel(textDict, args.workers, args.shards)
+    else:
+        gramDicts = {lang: createGramDicts(text) for lang, text in textDict.items()}
 
     #Save pickle files of dictionaries along with corresponding language
-    savePickleFile(ugram_1, "data/ugram_dict_"+fileParts_1[-1]+".p")
-    savePickleFile(bigram_1, "data/bigram_dict_"+fileParts_1[-1]+".p")
-    savePickleFile(ugram_2, "data/ugram_dict_"+fileParts_2[-1]+".p")
-    savePickleFile(bigram_2, "data/bigram_dict_"+fileParts_2[-1]+".p")
-    savePickleFile(ugram_3, "data/ugram_dict_"+fileParts_3[-1]+".p")
-    savePickleFile(bigram_3, "data/bigram_dict_"+fileParts_3[-1]+".p")
+    for lang, (ugram_dict, bigram_dict) in gramDicts.items():
+        savePickleFile(ugram_dict, "data/ugram_dict_"+lang+".p")
+        savePickleFile(bigram_dict, "data/bigram_dict_"+lang+".p")
+
+    #Save the memory-mapped model used by Program-2
+    saveCompactModel("data/langid_model.bin", gramDicts)
 
 if __name__ == '__main__':
     main()
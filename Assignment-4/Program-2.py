@@ -1,111 +1,62 @@
 #Program opens the unigram and bigram dictionaries
 #It reads a file of sentences in different languages; predicts which language they're derived from; and saves results in a txt file
-#Opens the result file and compare them with the correct labels
+#Compares the results with the correct labels while classifying
 #Prints the accuracy along with the incorrect lines
+#Streaming example call: python Program-2.py --stream big.log --out results.txt
+#Streaming with accuracy: cat data/LangId.test | python Program-2.py --stream - --gold data/LangId.sol
+#Uses the memory-mapped model data/langid_model.bin when it exists; otherwise falls back to the pickled dictionaries
+#Sentences are scored in batches in log space by langid_scorer.BatchScorer with the original Laplace smoothed bigram probabilities
+#Each line is tokenized once and its bigrams are scored against every registered language
 
-from nltk import word_tokenize
-from nltk.util import ngrams
-import pickle
+import os
+import sys
+import argparse
+from langid_scorer import loadScorer
+from langid_stream import runStream
 
-#readFile reads a file and returns the data
-def readFile(filePath):
-    data = ""
-    with open(filePath, 'r') as f:
-        data = f.read()
+#Shared NLP resources live in the repository root; NLTK is only imported when text is tokenized
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import wordTokens as word_tokenize, ensureResources
 
-    return data
-
-#Use Laplace smoothing to generate probability of language origin
-def calc_prob(text_input, unigram_dict, bigram_dict, vocab_size):
-    tokens = word_tokenize(text_input) #Tokenize the text input
-
-    #Extract unigrams and bigrams from the tokens
-    unigram_input = list(ngrams(tokens, 1)) 
-    bigrams_input = list(ngrams(tokens, 2))
-
-    prob_laplace = 1
-
-    #Iterate through each bigram
-    for bigram in bigrams_input:
-
-        #Extract count from bigram dictionary; otherwise set count to 0 for non-existent bigram
-        b = bigram_dict[bigram] if bigram in bigram_dict else 0
-
-        #For bigram's first word, extract count from unigram dictionary; otherwise set count to 0 for non-existent unigram
-        u = unigram_dict[(bigram[0],)] if (bigram[0],) in unigram_dict else 0
-
-        #Calculate Laplace Smoothing
-        prob_laplace *= ((b+1)/(u+vocab_size))
-
-    return prob_laplace
+#Amount of sentences tokenized and scored together
+BATCH_SIZE = 1024
 
 def main():
+    parser = argparse.ArgumentParser(description="Identify the language of each line")
+    parser.add_argument("--stream", metavar="INPUT", help="Classify lines of INPUT ('-' for stdin) instead of data/LangId.test")
+    parser.add_argument("--gold", help="Solution file to measure accuracy against while streaming")
+    parser.add_argument("--out", default="-", help="Result file in streaming mode (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Lines tokenized and scored together")
+    args = parser.parse_args()
 
-    #Open the unigram and bigram dictionaries
-    ugram_dict_eng = pickle.load(open('data/ugram_dict_English.p', 'rb'))
-    bigram_dict_eng = pickle.load(open('data/bigram_dict_English.p', 'rb'))
-    
-    ugram_dict_fre = pickle.load(open('data/ugram_dict_French.p', 'rb'))
-    bigram_dict_fre = pickle.load(open('data/bigram_dict_French.p', 'rb'))
-
-    ugram_dict_ita = pickle.load(open('data/ugram_dict_Italian.p', 'rb'))
-    bigram_dict_ita = pickle.load(open('data/bigram_dict_Italian.p', 'rb'))
-    
-    #Read in test file 
-    testFileArr = readFile("data/LangId.test").splitlines()
-
-    #Extract correct labels
-    testFileLabels = [i.split()[1] for i in readFile("data/LangId.sol").splitlines()]
-
-    #Calculate total vocab size of the three languages
-    vocab_size = len(ugram_dict_eng)+len(ugram_dict_fre)+len(ugram_dict_ita)
-    
-    resArr = []
-
-    #Iterate through test file and calculate language probability for each sentence
-    for i in range(len(testFileArr)):
-        prob_eng = calc_prob(testFileArr[i], ugram_dict_eng, bigram_dict_eng, vocab_size)
-        prob_fre = calc_prob(testFileArr[i], ugram_dict_fre, bigram_dict_fre, vocab_size)
-        prob_ita = calc_prob(testFileArr[i], ugram_dict_ita, bigram_dict_ita, vocab_size)
-        probRes = max(prob_eng, prob_fre, prob_ita)
-
-        #Save line number and chosen language 
-        if probRes == prob_eng:
-            resArr.append(str(i+1) + " " + "English")
-        elif probRes == prob_fre:
-            resArr.append(str(i+1) + " " + "French")
-        else:
-            resArr.append(str(i+1) + " " + "Italian")  
+    #Stop right away if the tokenizer data is missing
+    ensureResources("punkt")
 
-    #Write the result file
-    with open("data/res.txt", "w") as file:
-        for res in resArr:
-            file.write(res+"\n")
+    #Default run: classify the test file into data/res.txt and compare with data/LangId.sol
+    if args.stream is None:
+        args.stream, args.out, args.gold = "data/LangId.test", "data/res.txt", "data/LangId.sol"
 
-    #Open the result file
-    resLabels = [i.split()[1] for i in readFile("data/res.txt").splitlines()]
+    #Load the language models
+    scorer = loadScorer()
 
-    #Measure accuracy
-    numCorrect = 0
-    totalAmt = len(testFileLabels)
-    lineArr = []
+    #Classify the lines in batches; results are written as they are scored and accuracy is measured on the fly
+    stats = runStream(args.stream, args.out, scorer, word_tokenize, args.gold, args.batch_size)
+    if stats is None:
+        return
 
-    #Iterate through the results and compare them with correct labels; if incorrect result, then save the line number in the array
-    for i in range(len(testFileLabels)):
-        if resLabels[i] == testFileLabels[i]:
-            numCorrect += 1
-        else:
-            lineArr.append(i+1)
+    #Print to stderr when results go to stdout, so the two outputs don't mix
+    report = sys.stderr if args.out == "-" else sys.stdout
 
     #Calculate and print accuracy
-    acc = numCorrect/totalAmt
-    print("Accuracy: %.2f"% acc)
+    print("Accuracy: %.2f"% stats.accuracy, file=report)
     
     #Print incorrect lines if they exist
-    if len(lineArr) > 0:
-        print("Incorrect Line(s):")
-        for lineNum in lineArr:
-            print(lineNum)
+    if stats.incorrectAmt > 0:
+        print("Incorrect Line(s):", file=report)
+        for lineNum in stats.incorrectLines:
+            print(lineNum, file=report)
+        if stats.incorrectAmt > len(stats.incorrectLines):
+            print("... and " + str(stats.incorrectAmt - len(stats.incorrectLines)) + " more", file=report)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+#Benchmark comparing the original count()-based n-gram dictionaries with the single-pass counting engine
+#Tokenizes each LangId.train.* corpus once, then times both implementations on the same tokens
+#The original implementation is quadratic; pass a token limit to keep its run short on large corpora
+
+#Example call: python benchmark_ngrams.py
+#Example call with a token limit: python benchmark_ngrams.py 20000
+
+import sys
+import time
+from nltk import word_tokenize
+from nltk.util import ngrams
+from ngram_counts import countNGrams
+
+#readFile reads a file and returns the data; same preprocessing as Program-1
+def readFile(filePath):
+    with open(filePath, 'r') as f:
+        data = f.read().splitlines()
+
+    return ''.join(data)
+
+#Original Program-1 implementation: one list.count() per distinct n-gram
+def createGramDictsNaive(tokens):
+    unigrams = list(ngrams(tokens, 1))
+    bigrams = list(ngrams(tokens, 2))
+
+    unigram_dict = {t:unigrams.count(t) for t in set(unigrams)}
+    bigram_dict = {b:bigrams.count(b) for b in set(bigrams)}
+
+    return unigram_dict, bigram_dict
+
+#Single-pass implementation used by Program-1
+def createGramDictsCounter(tokens):
+    return dict(countNGrams(tokens, 1)), dict(countNGrams(tokens, 2))
+
+#Time a function call; returns the result and the elapsed seconds
+def timeCall(func, *args):
+    start = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - start
+
+def main():
+    tokenLimit = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    filePaths = ["data/LangId.train.English", "data/LangId.train.French", "data/LangId.train.Italian"]
+
+    print("%-10s %10s %12s %12s %10s" % ("Language", "Tokens", "Naive (s)", "Counter (s)", "Speedup"))
+    for filePath in filePaths:
+        tokens = word_tokenize(readFile(filePath))
+        if tokenLimit:
+            tokens = tokens[:tokenLimit]
+
+        naiveRes, naiveTime = timeCall(createGramDictsNaive, tokens)
+        counterRes, counterTime = timeCall(createGramDictsCounter, tokens)
+
+        #Both implementations must produce the same tables
+        if naiveRes != counterRes:
+            print("Error: results differ for " + filePath)
+            exit()
+
+        print("%-10s %10d %12.3f %12.3f %9.0fx" % (filePath.split(".")[-1], len(tokens), naiveTime, counterTime, naiveTime/max(counterTime, 1e-9)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#Local load generator for langid_server.py
+#Sends lines of data/LangId.test from concurrent client threads and reports client-side latency and throughput
+#Also prints the server's own /stats counters after the run
+
+#Example call: python langid_loadgen.py --url http://127.0.0.1:8395 --clients 16 --requests 2000
+#Start a server inside this process instead: python langid_loadgen.py --local
+
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from itertools import cycle
+from langid_server import createServer, percentile
+
+#Send one identify request; returns the list of languages
+def identify(url, lines):
+    data = json.dumps({"lines": lines}).encode("utf-8")
+    req = urllib.request.Request(url + "/identify", data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())["languages"]
+
+#Fetch the server's stats
+def fetchStats(url):
+    with urllib.request.urlopen(url + "/stats") as response:
+        return json.loads(response.read())
+
+#runLoad sends requestAmt requests of linesPerRequest lines from clientAmt threads
+#Returns the sorted client latencies in seconds and the wall time of the run
+def runLoad(url, lines, clientAmt, requestAmt, linesPerRequest):
+    latencies = []
+    lock = threading.Lock()
+    lineSource = cycle(lines)
+    counter = iter(range(requestAmt))
+
+    def client():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+                payload = [next(lineSource) for _ in range(linesPerRequest)]
+
+            start = time.perf_counter()
+            identify(url, payload)
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clientAmt)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sorted(latencies), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the language identification server")
+    parser.add_argument("--url", default="http://127.0.0.1:8395")
+    parser.add_argument("--local", action="store_true", help="Start a server in this process on a free port")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--lines-per-request", type=int, default=1)
+    parser.add_argument("--input", default="data/LangId.test")
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as f:
+        lines = f.read().splitlines()
+
+    server = None
+    if args.local:
+        from langid_scorer import loadScorer
+        server = createServer("127.0.0.1", 0, loadScorer())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = "http://127.0.0.1:%d" % server.server_address[1]
+
+    #Warm up the connection path before measuring
+    identify(args.url, lines[:1])
+
+    latencies, wallTime = runLoad(args.url, lines, args.clients, args.requests, args.lines_per_request)
+
+    print("Requests: %d from %d clients in %.2f s" % (len(latencies), args.clients, wallTime))
+    print("Throughput: %.0f requests/s, %.0f lines/s" % (len(latencies)/wallTime, len(latencies)*args.lines_per_request/wallTime))
+    print("Client latency: p50 %.2f ms, p90 %.2f ms, p99 %.2f ms" % tuple(percentile(latencies, q) * 1000 for q in (0.50, 0.90, 0.99)))
+
+    print("\nServer stats:")
+    for key, val in fetchStats(args.url).items():
+        print("%s: %.2f" % (key, val) if isinstance(val, float) else "%s: %s" % (key, val))
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        server.batcher.stop()
+
+if __name__ == '__main__':
+    main()
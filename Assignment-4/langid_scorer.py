@@ -0,0 +1,158 @@
+#Vectorized log-space scorer for the bigram language models
+#Maps a batch of tokenized sentences to vocabulary ids and scores every language at once with NumPy gathers
+#Summing log probabilities avoids the underflow to 0.0 that multiplying raw probabilities hits on long sentences
+#Note: Must install numpy via pip
+
+import os
+import pickle
+import numpy as np
+from ngram_model import CompactModel, pickleLanguages, isStale, convertPickles
+
+#Score of a bigram with Laplace smoothing, as in the original Program-2: log((bigram count + 1) / (first word count + vocab size))
+#Bigrams that never occur in training share the score log(1 / (first word count + vocab size)), so that part is stored per first word
+class BatchScorer:
+    def __init__(self, languages, tokenId, vocabAmt, vocabSize, tables):
+        self.languages = list(languages)
+        self.tokenId = tokenId #Function returning a token's id or None
+        self.oovId = vocabAmt #Unknown tokens share the id after the last vocabulary entry
+        self.vocabSize = vocabSize
+
+        #Precompute the log-probability tables of every language
+        self.bigramKeys = []
+        self.bigramLogProbs = []
+        self.unseenLogProbs = []
+        for unigramCounts, bigramKeys, bigramCounts in tables:
+            unigramCounts = np.append(np.asarray(unigramCounts, dtype=np.float64), 0) #Unknown tokens have a count of 0
+            bigramKeys = np.asarray(bigramKeys, dtype=np.uint64)
+
+            self.bigramKeys.append(bigramKeys)
+            self.unseenLogProbs.append(-np.log(unigramCounts + vocabSize))
+            self.bigramLogProbs.append(np.log(np.asarray(bigramCounts, dtype=np.float64) + 1)
+                                       - np.log(unigramCounts[(bigramKeys >> np.uint64(32)).astype(np.int64)] + vocabSize))
+
+    #Build a scorer over a CompactModel; the count arrays are read straight from the memory map
+    @classmethod
+    def fromModel(cls, model):
+        tables = [(np.frombuffer(t.unigramCounts, dtype=np.uint32),
+                   np.frombuffer(t.bigramKeys, dtype=np.uint64),
+                   np.frombuffer(t.bigramCounts, dtype=np.uint32)) for t in model.tables.values()]
+        return cls(model.languages, model.tokenId, model.vocabAmt, model.vocabSize, tables)
+
+    #Build a scorer from {language: (unigram dictionary, bigram dictionary)} with the Program-1 keys
+    @classmethod
+    def fromDicts(cls, langDicts):
+        vocab = {}
+        for unigram_dict, bigram_dict in langDicts.values():
+            for (t,) in unigram_dict:
+                vocab.setdefault(t, len(vocab))
+            for bigram in bigram_dict:
+                for t in bigram:
+                    vocab.setdefault(t, len(vocab))
+
+        tables = []
+        for unigram_dict, bigram_dict in langDicts.values():
+            unigramCounts = np.zeros(len(vocab), dtype=np.uint32)
+            for (t,), count in unigram_dict.items():
+                unigramCounts[vocab[t]] = count
+
+            keyed = sorted(((vocab[b[0]] << 32) | vocab[b[1]], count) for b, count in bigram_dict.items())
+            tables.append((unigramCounts,
+                           np.array([k for k, _ in keyed], dtype=np.uint64),
+                           np.array([c for _, c in keyed], dtype=np.uint32)))
+
+        vocabSize = sum(len(unigram_dict) for unigram_dict, _ in langDicts.values())
+        return cls(langDicts.keys(), vocab.get, len(vocab), vocabSize, tables)
+
+    #Map a list of tokens to an id array; unknown tokens get the shared unknown id
+    def tokenIds(self, tokens):
+        oov = self.oovId
+        return np.fromiter((oov if i is None else i for i in map(self.tokenId, tokens)), dtype=np.int64, count=len(tokens))
+
+    #Score a batch of tokenized sentences
+    #Returns a languages x sentences matrix of log probabilities
+    def scoreTokens(self, tokenLists):
+        firstIds, secondIds, sentIdx = [], [], []
+        for i, tokens in enumerate(tokenLists):
+            if len(tokens) < 2:
+                continue
+            ids = self.tokenIds(tokens)
+            firstIds.append(ids[:-1])
+            secondIds.append(ids[1:])
+            sentIdx.append(np.full(len(ids) - 1, i, dtype=np.int64))
+
+        scores = np.zeros((len(self.languages), len(tokenLists)))
+        if not firstIds:
+            return scores
+
+        firstIds = np.concatenate(firstIds)
+        queryKeys = (firstIds.astype(np.uint64) << np.uint64(32)) | np.concatenate(secondIds).astype(np.uint64)
+        sentIdx = np.concatenate(sentIdx)
+
+        for l in range(len(self.languages)):
+            keys = self.bigramKeys[l]
+            if len(keys) == 0:
+                logProbs = self.unseenLogProbs[l][firstIds]
+            else:
+                #Binary search every query bigram in the sorted keys; misses fall back to the unseen-bigram score
+                idx = np.minimum(np.searchsorted(keys, queryKeys), len(keys) - 1)
+                found = keys[idx] == queryKeys
+                logProbs = np.where(found, self.bigramLogProbs[l][idx], self.unseenLogProbs[l][firstIds])
+            scores[l] = np.bincount(sentIdx, weights=logProbs, minlength=len(tokenLists))
+
+        return scores
+
+    #Return the most probable language of each sentence; ties go to the first language, as in Program-2
+    def predict(self, tokenLists):
+        if not tokenLists:
+            return []
+        best = np.argmax(self.scoreTokens(tokenLists), axis=0)
+        return [self.languages[i] for i in best]
+
+#ModelRegistry collects the language models that one tokenization of a sentence is scored against
+#Languages are registered from dictionaries or discovered from the pickles written by Program-1
+class ModelRegistry:
+    def __init__(self):
+        self.models = {}
+
+    #Register (or replace) a language with its unigram and bigram dictionaries
+    def register(self, lang, unigram_dict, bigram_dict):
+        self.models[lang] = (unigram_dict, bigram_dict)
+
+    #Register every ugram_dict_<lang>.p / bigram_dict_<lang>.p pair found in a directory
+    #Languages are registered in alphabetical order, which is also the tie-breaking order
+    def discoverPickles(self, dataDir):
+        for lang in pickleLanguages(dataDir):
+            with open(os.path.join(dataDir, "ugram_dict_" + lang + ".p"), 'rb') as f:
+                unigram_dict = pickle.load(f)
+            with open(os.path.join(dataDir, "bigram_dict_" + lang + ".p"), 'rb') as f:
+                bigram_dict = pickle.load(f)
+            self.register(lang, unigram_dict, bigram_dict)
+
+    @property
+    def languages(self):
+        return list(self.models)
+
+    #Build one scorer over every registered language
+    def buildScorer(self):
+        if not self.models:
+            raise ValueError("No language models registered")
+        return BatchScorer.fromDicts(self.models)
+
+#loadScorer builds the batch scorer from dataDir/langid_model.bin if Program-1 (or ngram_model.py) generated it
+#Every ugram_dict_*/bigram_dict_* pickle pair in dataDir is discovered, so a new language only needs its pickles:
+#when the compact model's languages don't match the pickles or a pickle is newer, the model is rebuilt from them first
+#Without a compact model (or when it can't be rewritten) the pickles are registered and scored directly
+def loadScorer(dataDir="data"):
+    modelPath = os.path.join(dataDir, "langid_model.bin")
+    languages = pickleLanguages(dataDir)
+    if os.path.exists(modelPath):
+        try:
+            if languages and isStale(modelPath, languages, dataDir):
+                convertPickles(languages, dataDir, modelPath)
+            return BatchScorer.fromModel(CompactModel(modelPath))
+        except OSError:
+            pass
+
+    registry = ModelRegistry()
+    registry.discoverPickles(dataDir)
+    return registry.buildScorer()
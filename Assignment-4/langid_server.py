@@ -0,0 +1,221 @@
+#Long-lived language identification server
+#Loads the language models and NLTK once, then answers HTTP requests until stopped
+#Concurrent requests are gathered into micro-batches so the batch scorer handles many lines per call
+#Exposes latency percentiles and throughput counters at /stats; langid_loadgen.py benchmarks a running server
+
+#Example call: python langid_server.py --port 8395
+#Request: curl -d '{"lines": ["Is there a member who wishes to speak ?"]}' http://127.0.0.1:8395/identify
+#Response: {"languages": ["English"]}
+
+import os
+import sys
+import json
+import math
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langid_scorer import loadScorer
+
+#Shared NLP resources live in the repository root; NLTK is only imported when text is tokenized
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import wordTokens as word_tokenize, ensureResources
+
+#LatencyStats records request latencies in a bounded window plus running counters
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.startTime = time.monotonic()
+        self.requestAmt = 0
+        self.lineAmt = 0
+        self.batchAmt = 0
+        self.batchedLineAmt = 0
+
+    def recordRequest(self, latency, lineAmt):
+        with self.lock:
+            self.latencies.append(latency)
+            self.requestAmt += 1
+            self.lineAmt += lineAmt
+
+    def recordBatch(self, lineAmt):
+        with self.lock:
+            self.batchAmt += 1
+            self.batchedLineAmt += lineAmt
+
+    #Return a dictionary of counters, throughput and latency percentiles in milliseconds
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = time.monotonic() - self.startTime
+            res = {"uptime_s": uptime,
+                   "requests": self.requestAmt,
+                   "lines": self.lineAmt,
+                   "requests_per_s": self.requestAmt/uptime if uptime else 0.0,
+                   "lines_per_s": self.lineAmt/uptime if uptime else 0.0,
+                   "batches": self.batchAmt,
+                   "mean_batch_lines": self.batchedLineAmt/self.batchAmt if self.batchAmt else 0.0}
+
+        for name, q in [("p50_ms", 0.50), ("p90_ms", 0.90), ("p99_ms", 0.99)]:
+            res[name] = percentile(latencies, q) * 1000
+        return res
+
+#Nearest-rank percentile of a sorted list; 0 for an empty list
+#Also used by langid_loadgen.py for the client-side latencies
+def percentile(sortedValues, q):
+    if not sortedValues:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sortedValues)))
+    return sortedValues[rank - 1]
+
+#MicroBatcher gathers tokenized lines from concurrent requests and scores them together
+#A batch is scored once it holds maxBatch lines or the first request in it has waited maxWait seconds
+class MicroBatcher:
+    def __init__(self, scorer, stats, maxBatch=256, maxWait=0.005):
+        self.scorer = scorer
+        self.stats = stats
+        self.maxBatch = maxBatch
+        self.maxWait = maxWait
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.running = True
+        self.thread.start()
+
+    #Queue a request's token lists; returns a Future resolving to the list of languages
+    def submit(self, tokenLists):
+        future = Future()
+        self.requests.put((tokenLists, future))
+        return future
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while self.running:
+            item = self.requests.get()
+            if item is None:
+                break
+
+            #Gather more requests until the batch is full or the wait budget is spent
+            batch = [item]
+            lineAmt = len(item[0])
+            deadline = time.monotonic() + self.maxWait
+            while lineAmt < self.maxBatch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.running = False
+                    break
+                batch.append(item)
+                lineAmt += len(item[0])
+
+            self._score(batch, lineAmt)
+
+    #Score every line of the batch in one call and hand each request its slice of the results
+    def _score(self, batch, lineAmt):
+        try:
+            languages = self.scorer.predict([tokens for tokenLists, _ in batch for tokens in tokenLists])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats.recordBatch(lineAmt)
+        start = 0
+        for tokenLists, future in batch:
+            future.set_result(languages[start:start + len(tokenLists)])
+            start += len(tokenLists)
+
+#HTTP handler; the server object carries the batcher and stats
+class LangIdHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._sendJson(200, self.server.stats.snapshot())
+        elif self.path == "/health":
+            self._sendJson(200, {"status": "ok", "languages": self.server.batcher.scorer.languages})
+        else:
+            self._sendJson(404, {"error": "not found"})
+
+    #POST /identify with {"lines": [...]} or {"text": "..."}; returns {"languages": [...]}
+    def do_POST(self):
+        if self.path != "/identify":
+            self._sendJson(404, {"error": "not found"})
+            return
+
+        start = time.monotonic()
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            lines = body["lines"] if "lines" in body else [body["text"]]
+            if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+                raise ValueError("lines must be a list of strings")
+        except (ValueError, KeyError, TypeError) as e:
+            self._sendJson(400, {"error": "invalid request: " + str(e)})
+            return
+
+        #Tokenize in the request thread; only scoring is batched
+        languages = self.server.batcher.submit([word_tokenize(line) for line in lines]).result()
+        self._sendJson(200, {"languages": languages})
+        self.server.stats.recordRequest(time.monotonic() - start, len(lines))
+
+    def _sendJson(self, status, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    #Silence the per-request access log
+    def log_message(self, format, *args):
+        pass
+
+#Threaded HTTP server with a listen backlog large enough for many concurrent clients
+class LangIdServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+#Create a server bound to host:port with preloaded models; port 0 picks a free port
+def createServer(host, port, scorer, maxBatch=256, maxWait=0.005):
+    server = LangIdServer((host, port), LangIdHandler)
+    server.stats = LatencyStats()
+    server.batcher = MicroBatcher(scorer, server.stats, maxBatch, maxWait)
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Language identification server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8395)
+    parser.add_argument("--data", default="data", help="Directory with langid_model.bin or the pickled dictionaries")
+    parser.add_argument("--max-batch", type=int, default=256, help="Most lines scored in one micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Longest time a request waits for a batch to fill")
+    args = parser.parse_args()
+
+    #Load the models and warm up the tokenizer before accepting requests
+    ensureResources("punkt")
+    scorer = loadScorer(args.data)
+    word_tokenize("Warm up .")
+
+    server = createServer(args.host, args.port, scorer, args.max_batch, args.max_wait_ms / 1000)
+    print("Serving " + ", ".join(scorer.languages) + " on http://%s:%d" % server.server_address[:2], file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#Streaming language identification built on the Program-2 batch scorer
+#Lines are read lazily from a file or stdin, classified in fixed-size batches, and written out as soon as each batch is scored
+#Accuracy against a gold file is computed while streaming, so memory stays bounded by the batch size
+
+import sys
+from itertools import islice
+
+#readLines lazily yields the lines of a file without line endings; "-" reads stdin
+def readLines(source):
+    if source == "-":
+        for line in sys.stdin:
+            yield line.rstrip("\r\n")
+        return
+
+    with open(source, 'r') as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+#Marks the end of the gold labels; None is the placeholder of a malformed label
+END = object()
+
+#Split an iterable into lists of at most size items
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+#classifyStream yields (line number, language) for every input line
+#Each batch is tokenized once and scored against every language of the scorer
+def classifyStream(lines, scorer, tokenize, batchSize=1024):
+    lineNum = 0
+    for batch in batched(lines, batchSize):
+        for lang in scorer.predict([tokenize(line) for line in batch]):
+            lineNum += 1
+            yield lineNum, lang
+
+#readGoldLabels lazily yields the labels of a solution file with "<line number> <language>" lines
+#Malformed lines yield None, so every later label stays paired with its own line; they count as incorrect
+def readGoldLabels(source):
+    for line in readLines(source):
+        parts = line.split()
+        yield parts[1] if len(parts) > 1 else None
+
+#StreamingAccuracy compares predictions with gold labels as they arrive
+#Only the first maxIncorrect wrong line numbers are kept, so memory stays bounded on large inputs
+class StreamingAccuracy:
+    def __init__(self, maxIncorrect=1000):
+        self.correct = 0
+        self.total = 0
+        self.incorrectAmt = 0
+        self.incorrectLines = []
+        self.maxIncorrect = maxIncorrect
+
+    def update(self, lineNum, predicted, gold):
+        self.total += 1
+        if gold is not None and predicted == gold:
+            self.correct += 1
+        else:
+            self.incorrectAmt += 1
+            if len(self.incorrectLines) < self.maxIncorrect:
+                self.incorrectLines.append(lineNum)
+
+    @property
+    def accuracy(self):
+        return self.correct/self.total if self.total else 0.0
+
+#runStream classifies lines from source and writes "<line number> <language>" lines to out ("-" for stdout)
+#When a gold file is given, returns a StreamingAccuracy; otherwise returns None
+#Accuracy is measured over the gold labels, as in the original Program-2: lines past the last label aren't scored,
+#and labels without a classified line count as incorrect
+def runStream(source, out, scorer, tokenize, gold=None, batchSize=1024):
+    outFile = sys.stdout if out == "-" else open(out, 'w')
+    goldLabels = readGoldLabels(gold) if gold else None
+    stats = StreamingAccuracy() if gold else None
+
+    try:
+        for batch in batched(classifyStream(readLines(source), scorer, tokenize, batchSize), batchSize):
+            for lineNum, lang in batch:
+                outFile.write(str(lineNum) + " " + lang + "\n")
+
+                if goldLabels is not None:
+                    goldLabel = next(goldLabels, END)
+                    if goldLabel is END:
+                        goldLabels = None
+                    else:
+                        stats.update(lineNum, lang, goldLabel)
+            outFile.flush()
+
+        #Gold labels left over after the input ran out
+        if goldLabels is not None:
+            for goldLabel in goldLabels:
+                stats.update(stats.total + 1, None, goldLabel)
+    finally:
+        if outFile is not sys.stdout:
+            outFile.close()
+
+    return stats
@@ -0,0 +1,82 @@
+#Streaming n-gram counting engine used by Program-1 to build the language models
+#Counts every n-gram in a single pass over the tokens, so training time grows linearly with corpus size
+#N-gram keys are tuples of n tokens, the same keys nltk.util.ngrams produces
+
+from collections import Counter
+from itertools import islice, tee
+
+
+#countNGrams counts the n-grams of a token sequence in one pass
+#Returns a Counter of n-gram: amount of n-gram in tokens
+def countNGrams(tokens, n):
+    if n < 1:
+        raise ValueError("n must be at least 1")
+
+    #Unigrams don't need the sliding window
+    if n == 1:
+        return Counter((t,) for t in tokens)
+
+    #Create n copies of the token stream, each shifted by its position in the n-gram, and zip them into windows
+    streams = tee(tokens, n)
+    shifted = [islice(stream, i, None) for i, stream in enumerate(streams)]
+    return Counter(zip(*shifted))
+
+
+#NGramCounter accumulates n-gram counts over a stream of token chunks
+#Keeps the first and last (max order - 1) tokens so n-grams spanning chunk or shard boundaries are counted exactly once
+class NGramCounter:
+    def __init__(self, orders=(1, 2)):
+        self.orders = tuple(sorted(set(orders)))
+        self.counts = {n: Counter() for n in self.orders}
+        self.edge = self.orders[-1] - 1 #Amount of boundary tokens needed by the highest order
+        self.head = []
+        self.tail = []
+        self.tokenAmt = 0
+
+    #Count a new chunk of tokens that directly follows the previous chunk
+    def update(self, tokens):
+        tokens = list(tokens)
+        if not tokens:
+            return self
+
+        window = self.tail + tokens
+        for n in self.orders:
+            #Skip n-grams that lie entirely inside the previous tail; they were counted by the earlier chunk
+            start = max(0, len(self.tail) - n + 1)
+            self.counts[n].update(countNGrams(window[start:], n))
+
+        self._extendEdges(tokens, window)
+        return self
+
+    #Merge the counts of a counter built over the text that directly follows this one (e.g. the next shard)
+    def merge(self, other):
+        if other.orders != self.orders:
+            raise ValueError("Cannot merge counters with different n-gram orders")
+        if other.tokenAmt == 0:
+            return self
+
+        for n in self.orders:
+            self.counts[n].update(other.counts[n])
+
+            #Count the n-grams that start in this counter's tail and end in the other counter's head
+            if n > 1:
+                boundary = self.tail + other.head
+                for start in range(max(0, len(self.tail) - n + 1), len(self.tail)):
+                    gram = tuple(boundary[start:start + n])
+                    if len(gram) == n:
+                        self.counts[n][gram] += 1
+
+        self._extendEdges(other.head, self.tail + other.tail, other.tokenAmt)
+        return self
+
+    #Return the counts of a single order as a plain dictionary
+    def gramDict(self, n):
+        return dict(self.counts[n])
+
+    #Helper that keeps the head/tail boundary tokens up to date
+    #window holds the previous tail followed by the new tokens (or the new tail when merging)
+    def _extendEdges(self, headTokens, window, amt=None):
+        if len(self.head) < self.edge:
+            self.head = (self.head + list(headTokens))[:self.edge]
+        self.tail = window[max(0, len(window) - self.edge):] if self.edge else []
+        self.tokenAmt += len(headTokens) if amt is None else amt
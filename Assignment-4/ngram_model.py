@@ -0,0 +1,296 @@
+#Compact on-disk format for the unigram and bigram language models
+#All languages share one interned vocabulary; tokens are stored once and referred to by integer ids
+#Each language stores a dense unigram count array and sorted (id1, id2) bigram keys with a parallel count array
+#Files are opened with mmap, so loading costs almost nothing and processes reading the same file share its pages
+
+#Convert every pickled model written by Program-1: python ngram_model.py
+#Layout (little-endian, sections aligned to 8 bytes):
+#  header: magic, version, language amount, vocabulary amount, vocabulary offsets position, vocabulary blob position
+#  language directory: name, distinct unigram amount, bigram amount, unigram/bigram key/bigram count positions
+#  vocabulary: uint64 offsets (vocab amount + 1) into a blob of UTF-8 tokens sorted by their bytes
+#  per language: uint32 unigram counts indexed by token id; uint64 bigram keys (id1 << 32 | id2); uint32 bigram counts
+
+import os
+import sys
+import glob
+import mmap
+import pickle
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+MAGIC = b'NGRM'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+LANG_ENTRY = struct.Struct('<32sQQQQQ')
+ALIGN = 8
+
+#Round a file position up to the section alignment
+def _align(pos):
+    return (pos + ALIGN - 1) // ALIGN * ALIGN
+
+#Convert an array to little-endian bytes
+def _toBytes(arr):
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+#Pack a bigram of token ids into one sortable integer key
+def bigramKey(id1, id2):
+    return (id1 << 32) | id2
+
+#Write a compact model file from {language: (unigram dictionary, bigram dictionary)}
+#Dictionaries use the Program-1 keys: (token,) for unigrams and (token1, token2) for bigrams
+#The file is written to a temporary path first and moved into place, so readers never see a partial model
+def saveCompactModel(filePath, langDicts):
+    #Intern every token into one sorted vocabulary shared by all languages
+    tokens = set()
+    for unigram_dict, bigram_dict in langDicts.values():
+        tokens.update(t for (t,) in unigram_dict)
+        for bigram in bigram_dict:
+            tokens.update(bigram)
+    encoded = sorted(t.encode('utf-8') for t in tokens)
+    ids = {tok.decode('utf-8'): i for i, tok in enumerate(encoded)}
+
+    offsets = array('Q', [0])
+    for tok in encoded:
+        offsets.append(offsets[-1] + len(tok))
+    blob = b''.join(encoded)
+
+    #Build the per-language sections
+    sections = []
+    for lang, (unigram_dict, bigram_dict) in langDicts.items():
+        unigramCounts = array('I', bytes(4 * len(encoded)))
+        for (t,), count in unigram_dict.items():
+            unigramCounts[ids[t]] = count
+
+        keyed = sorted((bigramKey(ids[b[0]], ids[b[1]]), count) for b, count in bigram_dict.items())
+        bigramKeys = array('Q', [k for k, _ in keyed])
+        bigramCounts = array('I', [c for _, c in keyed])
+        sections.append((lang, len(unigram_dict), unigramCounts, bigramKeys, bigramCounts))
+
+    #Lay out the file
+    pos = _align(HEADER.size + LANG_ENTRY.size * len(sections))
+    offsetsPos = pos
+    pos = _align(pos + 8 * len(offsets))
+    blobPos = pos
+    pos = _align(pos + len(blob))
+
+    entries = []
+    for lang, typeAmt, unigramCounts, bigramKeys, bigramCounts in sections:
+        unigramPos = pos
+        pos = _align(pos + 4 * len(unigramCounts))
+        keyPos = pos
+        pos = _align(pos + 8 * len(bigramKeys))
+        countPos = pos
+        pos = _align(pos + 4 * len(bigramCounts))
+        entries.append((lang, typeAmt, len(bigramKeys), unigramPos, keyPos, countPos))
+
+    chunks = [(0, HEADER.pack(MAGIC, VERSION, len(sections), len(encoded), offsetsPos, blobPos))]
+    for i, (lang, typeAmt, bigramAmt, unigramPos, keyPos, countPos) in enumerate(entries):
+        chunks.append((HEADER.size + i * LANG_ENTRY.size, LANG_ENTRY.pack(lang.encode('utf-8'), typeAmt, bigramAmt, unigramPos, keyPos, countPos)))
+    chunks.append((offsetsPos, _toBytes(offsets)))
+    chunks.append((blobPos, blob))
+    for (_, _, _, unigramPos, keyPos, countPos), (_, _, unigramCounts, bigramKeys, bigramCounts) in zip(entries, sections):
+        chunks.extend([(unigramPos, _toBytes(unigramCounts)), (keyPos, _toBytes(bigramKeys)), (countPos, _toBytes(bigramCounts))])
+
+    dirName = os.path.dirname(os.path.abspath(filePath))
+    fd, tmpPath = tempfile.mkstemp(dir=dirName, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.truncate(pos)
+            for chunkPos, data in chunks:
+                f.seek(chunkPos)
+                f.write(data)
+        os.chmod(tmpPath, 0o644)
+        os.replace(tmpPath, filePath)
+    except BaseException:
+        os.remove(tmpPath)
+        raise
+
+#Sequence view over the sorted vocabulary; lets bisect search the mmapped tokens without decoding them all
+class _VocabView:
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i+1]].tobytes()
+
+#One language's tables inside a CompactModel
+class LanguageTable:
+    def __init__(self, model, name, typeAmt, unigramCounts, bigramKeys, bigramCounts):
+        self.model = model
+        self.name = name
+        self.typeAmt = typeAmt
+        self.unigramCounts = unigramCounts
+        self.bigramKeys = bigramKeys
+        self.bigramCounts = bigramCounts
+        self.unigrams = _UnigramView(self)
+        self.bigrams = _BigramView(self)
+
+    #Count of a token id; 0 for unknown tokens (None)
+    def unigramCount(self, tokenId):
+        return 0 if tokenId is None else self.unigramCounts[tokenId]
+
+    #Count of a bigram of token ids; binary search over the sorted keys
+    def bigramCount(self, id1, id2):
+        if id1 is None or id2 is None:
+            return 0
+        key = bigramKey(id1, id2)
+        idx = bisect_left(self.bigramKeys, key)
+        if idx < len(self.bigramKeys) and self.bigramKeys[idx] == key:
+            return self.bigramCounts[idx]
+        return 0
+
+#Read-only dictionary views with the Program-1 tuple keys, so code written for the pickled dictionaries works unchanged
+class _UnigramView:
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return self.table.typeAmt
+
+    def __contains__(self, key):
+        return self.table.unigramCount(self.table.model.tokenId(key[0])) > 0
+
+    def __getitem__(self, key):
+        count = self.table.unigramCount(self.table.model.tokenId(key[0]))
+        if count == 0:
+            raise KeyError(key)
+        return count
+
+class _BigramView:
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table.bigramKeys)
+
+    def __contains__(self, key):
+        return self._count(key) > 0
+
+    def __getitem__(self, key):
+        count = self._count(key)
+        if count == 0:
+            raise KeyError(key)
+        return count
+
+    def _count(self, key):
+        model = self.table.model
+        return self.table.bigramCount(model.tokenId(key[0]), model.tokenId(key[1]))
+
+#Memory-mapped model file holding every language
+class CompactModel:
+    def __init__(self, filePath, tokenCacheSize=65536):
+        self.filePath = filePath
+        with open(filePath, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.buffer)
+
+        magic, version, langAmt, vocabAmt, offsetsPos, blobPos = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(filePath + " is not a compact n-gram model")
+        if version != VERSION:
+            raise ValueError("Unsupported model version: " + str(version))
+
+        self.vocabAmt = vocabAmt
+        offsets = view[offsetsPos:offsetsPos + 8 * (vocabAmt + 1)].cast('Q')
+        self.vocab = _VocabView(offsets, view[blobPos:blobPos + offsets[vocabAmt]])
+
+        self.tables = {}
+        for i in range(langAmt):
+            name, typeAmt, bigramAmt, unigramPos, keyPos, countPos = LANG_ENTRY.unpack_from(self.buffer, HEADER.size + i * LANG_ENTRY.size)
+            name = name.rstrip(b'\0').decode('utf-8')
+            self.tables[name] = LanguageTable(self, name, typeAmt,
+                view[unigramPos:unigramPos + 4 * vocabAmt].cast('I'),
+                view[keyPos:keyPos + 8 * bigramAmt].cast('Q'),
+                view[countPos:countPos + 4 * bigramAmt].cast('I'))
+
+        #Cache the most frequent token lookups; bounded so memory stays flat on large inputs
+        self.tokenId = lru_cache(maxsize=tokenCacheSize)(self._lookupToken)
+
+    #List of language names in file order
+    @property
+    def languages(self):
+        return list(self.tables)
+
+    #Vocabulary size used for Laplace smoothing: sum of each language's distinct unigrams, as in Program-2
+    @property
+    def vocabSize(self):
+        return sum(table.typeAmt for table in self.tables.values())
+
+    #Return the id of a token or None if the token is not in the vocabulary
+    def _lookupToken(self, token):
+        encoded = token.encode('utf-8')
+        idx = bisect_left(self.vocab, encoded)
+        if idx < len(self.vocab) and self.vocab[idx] == encoded:
+            return idx
+        return None
+
+    #Map a list of tokens to ids (None for unknown tokens)
+    def tokenIds(self, tokens):
+        return [self.tokenId(t) for t in tokens]
+
+    #Return the token of an id
+    def token(self, tokenId):
+        return self.vocab[tokenId].decode('utf-8')
+
+    def close(self):
+        self.tokenId.cache_clear()
+        self.tables = {}
+        self.vocab = None
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass #Views handed out to callers are still alive; the mapping is released once they are collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#Languages with both a ugram_dict_<lang>.p and a bigram_dict_<lang>.p pickle in dataDir, in alphabetical order
+def pickleLanguages(dataDir):
+    languages = []
+    for ugramPath in sorted(glob.glob(os.path.join(dataDir, "ugram_dict_*.p"))):
+        lang = os.path.basename(ugramPath)[len("ugram_dict_"):-len(".p")]
+        if os.path.exists(os.path.join(dataDir, "bigram_dict_" + lang + ".p")):
+            languages.append(lang)
+    return languages
+
+#True if the compact model doesn't hold exactly the given pickled languages or any of their pickles is newer than it
+def isStale(filePath, languages, dataDir):
+    modelTime = os.path.getmtime(filePath)
+    for lang in languages:
+        for prefix in ("ugram_dict_", "bigram_dict_"):
+            if os.path.getmtime(os.path.join(dataDir, prefix + lang + ".p")) > modelTime:
+                return True
+    with CompactModel(filePath) as model:
+        return set(model.languages) != set(languages)
+
+#Convert the pickled dictionaries of the given languages into one compact model file
+def convertPickles(languages, dataDir, filePath):
+    langDicts = {}
+    for lang in languages:
+        with open(os.path.join(dataDir, "ugram_dict_" + lang + ".p"), 'rb') as f:
+            unigram_dict = pickle.load(f)
+        with open(os.path.join(dataDir, "bigram_dict_" + lang + ".p"), 'rb') as f:
+            bigram_dict = pickle.load(f)
+        langDicts[lang] = (unigram_dict, bigram_dict)
+
+    saveCompactModel(filePath, langDicts)
+
+def main():
+    convertPickles(pickleLanguages("data"), "data", "data/langid_model.bin")
+    print("Saved data/langid_model.bin")
+
+if __name__ == '__main__':
+    main()
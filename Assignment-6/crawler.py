@@ -0,0 +1,261 @@
+#Frontier-based crawl scheduler for the web crawler
+#URLs wait in a priority frontier (lowest priority value first; breadth-first by default) and are crawled up to a depth limit
+#URLs are canonicalized and deduplicated with a set of 64-bit hashes, so memory per seen URL stays small
+#Requests to the same host are spaced out, robots.txt rules are honoured, and the crawl state is checkpointed to a JSON file
+#An interrupted crawl started again with the same checkpoint file resumes where it stopped
+
+import os
+import sys
+import json
+import time
+import heapq
+import asyncio
+import hashlib
+import tempfile
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from bs4 import BeautifulSoup
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+#Canonicalize a URL so equivalent spellings map to one string
+#Lower-cases scheme and host, drops default ports and fragments, sorts query parameters, and resolves relative links against base
+def canonicalizeUrl(url, base=None):
+    if base:
+        url = urljoin(base, url)
+    #Malformed URLs (e.g. a port that isn't a number) are skipped
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    if port and port != DEFAULT_PORTS[scheme]:
+        host += ":" + str(port)
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+#Hash a URL to a 64-bit integer
+def urlHash(url):
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+#SeenSet remembers URLs by their 64-bit hash instead of the full string
+class SeenSet:
+    def __init__(self, hashes=()):
+        self.hashes = set(hashes)
+
+    #Add a URL; returns True if it wasn't seen before
+    def add(self, url):
+        h = urlHash(url)
+        if h in self.hashes:
+            return False
+        self.hashes.add(h)
+        return True
+
+    def __contains__(self, url):
+        return urlHash(url) in self.hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+#HostRateLimiter spaces requests to the same host at least delay seconds apart
+class HostRateLimiter:
+    def __init__(self, delay):
+        self.delay = delay
+        self.nextTime = {}
+
+    #Wait for the host's turn; a host-specific delay (e.g. a robots.txt Crawl-delay) can raise the spacing
+    async def wait(self, host, delay=None):
+        delay = max(self.delay, delay or 0)
+        now = time.monotonic()
+        start = max(now, self.nextTime.get(host, now))
+        self.nextTime[host] = start + delay #Reserve the slot before sleeping so concurrent callers queue up behind it
+        if start > now:
+            await asyncio.sleep(start - now)
+
+#RobotsCache fetches and parses robots.txt once per host
+#Hosts whose robots.txt can't be fetched are crawled without restrictions
+class RobotsCache:
+    def __init__(self, fetcher, userAgent="*"):
+        self.fetcher = fetcher
+        self.userAgent = userAgent
+        self.parsers = {}
+
+    async def _parser(self, url):
+        parts = urlsplit(url)
+        root = parts.scheme + "://" + parts.netloc
+        while True:
+            if root not in self.parsers:
+                await self._fetchParser(root)
+            parser = self.parsers.get(root)
+            if parser is not None:
+                return parser
+            if root in self.parsers:
+                await asyncio.sleep(0.01) #Another caller is fetching this host's robots.txt
+
+    #Fetch and parse a host's robots.txt; a None placeholder makes concurrent callers wait instead of fetching twice
+    #The placeholder is always replaced: by the parser, or removed if the fetch was cancelled so the next caller retries
+    async def _fetchParser(self, root):
+        self.parsers[root] = None
+        parser = None
+        try:
+            result = await self.fetcher.fetch(root + "/robots.txt")
+            parser = RobotFileParser()
+            parser.parse(result.text().splitlines() if result.ok else [])
+        except Exception:
+            parser = RobotFileParser()
+            parser.parse([])
+        finally:
+            if parser is None:
+                del self.parsers[root]
+            else:
+                self.parsers[root] = parser
+
+    async def allowed(self, url):
+        return (await self._parser(url)).can_fetch(self.userAgent, url)
+
+    async def crawlDelay(self, url):
+        return (await self._parser(url)).crawl_delay(self.userAgent)
+
+#Extract the links of a page's a tags as raw href strings
+def extractLinks(html):
+    soup = BeautifulSoup(html, features="html.parser")
+    return [str(link.get('href')) for link in soup.find_all("a") if link.get('href')]
+
+#FrontierCrawler crawls from seed URLs through a shared fetcher.AsyncFetcher
+#linkFilter(href, pageUrl) returns the URL to follow (or None to skip it)
+#priority(url, depth) orders the frontier; lower values are crawled first
+#onPage(url, body) is called with each valid page as soon as it is fetched; bodies aren't kept by the crawler
+class FrontierCrawler:
+    def __init__(self, fetcher, seeds, maxDepth=1, maxPages=100, linkFilter=None, priority=None,
+                 hostDelay=1.0, respectRobots=True, userAgent="*", checkpointPath=None, checkpointEvery=20, workers=None, onPage=None):
+        self.fetcher = fetcher
+        self.maxDepth = maxDepth
+        self.maxPages = maxPages
+        self.linkFilter = linkFilter or (lambda href, pageUrl: href)
+        self.priority = priority or (lambda url, depth: depth)
+        self.rateLimiter = HostRateLimiter(hostDelay)
+        self.robots = RobotsCache(fetcher, userAgent) if respectRobots else None
+        self.checkpointPath = checkpointPath
+        self.checkpointEvery = checkpointEvery
+        self.workers = workers or fetcher.concurrency
+        self.onPage = onPage
+
+        self.frontier = [] #Heap of (priority, sequence, url, depth)
+        self.seq = 0
+        self.seen = SeenSet()
+        self.results = [] #(sequence, depth, url) of valid pages
+        self.inFlight = 0
+        self.sinceCheckpoint = 0
+
+        if checkpointPath and os.path.exists(checkpointPath):
+            self.loadCheckpoint()
+        else:
+            for url in seeds:
+                self.push(canonicalizeUrl(url) or url, 0)
+
+    #Add a URL to the frontier unless it was seen before
+    def push(self, url, depth):
+        if self.seen.add(url):
+            heapq.heappush(self.frontier, (self.priority(url, depth), self.seq, url, depth))
+            self.seq += 1
+
+    #Crawl until the frontier is empty or maxPages valid pages are found
+    #Returns the valid URLs in the order they were discovered
+    async def run(self):
+        self.cond = asyncio.Condition()
+        try:
+            await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+        finally:
+            self.saveCheckpoint() #Also runs when the crawl is interrupted
+        return [url for _, _, url in sorted(self.results)]
+
+    def _finished(self):
+        return len(self.results) >= self.maxPages
+
+    #Every in-flight URL holds a slot of the page budget, so no more pages are requested than can still count
+    #and the pages that count are the first ones in frontier order; a failed fetch frees its slot for the next URL
+    def _budgetFull(self):
+        return len(self.results) + self.inFlight >= self.maxPages
+
+    async def _worker(self):
+        while True:
+            async with self.cond:
+                while (not self.frontier or self._budgetFull()) and self.inFlight > 0 and not self._finished():
+                    await self.cond.wait()
+                if not self.frontier or self._finished():
+                    self.cond.notify_all()
+                    return
+                entry = heapq.heappop(self.frontier)
+                _, seq, url, depth = entry
+                self.inFlight += 1
+
+            try:
+                await self._crawl(url, depth, seq)
+            except asyncio.CancelledError:
+                #Interrupted mid-crawl: put the URL back so the checkpoint still contains it
+                heapq.heappush(self.frontier, entry)
+                self.inFlight -= 1
+                raise
+            except Exception as e:
+                #One bad page doesn't end the crawl: report it and count the URL as done
+                print("Error: crawling " + url + " failed: " + repr(e), file=sys.stderr)
+
+            async with self.cond:
+                self.inFlight -= 1
+                self.cond.notify_all()
+
+    #Fetch one URL politely, record it if valid, and queue its links
+    async def _crawl(self, url, depth, seq):
+        delay = None
+        if self.robots is not None:
+            if not await self.robots.allowed(url):
+                return
+            delay = await self.robots.crawlDelay(url)
+
+        await self.rateLimiter.wait(urlsplit(url).netloc, delay)
+        result = await self.fetcher.fetch(url)
+        if not result.ok or self._finished():
+            return
+
+        self.results.append((seq, depth, url))
+        if self.onPage is not None:
+            self.onPage(url, result.body)
+
+        if depth < self.maxDepth:
+            for href in extractLinks(result.body):
+                link = self.linkFilter(href, url)
+                link = canonicalizeUrl(link, url) if link else None
+                if link:
+                    self.push(link, depth + 1)
+
+        self.sinceCheckpoint += 1
+        if self.checkpointPath and self.sinceCheckpoint >= self.checkpointEvery:
+            self.saveCheckpoint()
+
+    #Save the frontier, seen hashes and results; written atomically so an interruption never leaves a broken checkpoint
+    def saveCheckpoint(self):
+        if not self.checkpointPath:
+            return
+        self.sinceCheckpoint = 0
+        state = {"frontier": self.frontier, "seq": self.seq, "seen": list(self.seen.hashes), "results": self.results}
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.checkpointPath)), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmpPath, self.checkpointPath)
+
+    def loadCheckpoint(self):
+        with open(self.checkpointPath, "r") as f:
+            state = json.load(f)
+        self.frontier = [tuple(item) for item in state["frontier"]]
+        heapq.heapify(self.frontier)
+        self.seq = state["seq"]
+        self.seen = SeenSet(state["seen"])
+        self.results = [tuple(item) for item in state["results"]]
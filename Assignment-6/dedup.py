@@ -0,0 +1,111 @@
+#Duplicate detection for the cleaned sites
+#Pages are fingerprinted with MinHash signatures over word shingles; LSH banding finds candidate pages with a similar signature,
+#and a page whose estimated Jaccard similarity to an earlier page reaches the threshold is a near-duplicate
+#Sentences are deduplicated exactly by a 64-bit hash of their normalized text, so each fact is kept once across all sites
+#Note: Must install numpy via pip
+
+import re
+import hashlib
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+
+#Mersenne prime for the MinHash permutations; (a * x + b) stays below 2^64 for 32-bit a, b and x
+PRIME = (1 << 61) - 1
+
+#Hash a string to an unsigned integer of the given amount of bytes
+def hashText(text, size=8):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=size).digest(), "little")
+
+#Return the set of 32-bit hashes of a text's word shingles (runs of k consecutive lower-cased words)
+#Texts shorter than k words become a single shingle
+def shingleHashes(text, k=5):
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= k:
+        return {hashText(" ".join(words), 4)} if words else set()
+    return {hashText(" ".join(words[i:i + k]), 4) for i in range(len(words) - k + 1)}
+
+#MinHasher builds fixed-length MinHash signatures from shingle hash sets
+class MinHasher:
+    def __init__(self, numPerm=64, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, numPerm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, numPerm, dtype=np.uint64)
+
+    #Signature of a shingle set; each entry is the minimum of one permutation over the shingles
+    def signature(self, shingles):
+        if not shingles:
+            return np.full(len(self.a), PRIME, dtype=np.uint64)
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return ((np.outer(self.a, x) + self.b[:, None]) % PRIME).min(axis=1)
+
+#Fraction of equal signature entries; estimates the Jaccard similarity of the shingle sets
+def estimateSimilarity(sig1, sig2):
+    return float(np.mean(sig1 == sig2))
+
+#PageDeduplicator remembers the signatures of the pages it has accepted
+#With bands of rows signature entries, pages with similarity s become candidates with probability 1 - (1 - s^rows)^bands
+class PageDeduplicator:
+    def __init__(self, threshold=0.8, numPerm=64, bands=16, shingleSize=5):
+        if numPerm % bands:
+            raise ValueError("numPerm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = numPerm // bands
+        self.shingleSize = shingleSize
+        self.hasher = MinHasher(numPerm)
+        self.signatures = [] #page id: signature
+        self.buckets = [{} for _ in range(bands)] #band: {band bytes: [page ids]}
+        self.dropped = 0
+
+    #Return the id of an accepted page the text duplicates, or None after accepting the text as a new page
+    def check(self, text):
+        sig = self.hasher.signature(shingleHashes(text, self.shingleSize))
+        keys = [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+        candidates = set()
+        for bucket, key in zip(self.buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        for pageId in sorted(candidates):
+            if estimateSimilarity(sig, self.signatures[pageId]) >= self.threshold:
+                self.dropped += 1
+                return pageId
+
+        pageId = len(self.signatures)
+        self.signatures.append(sig)
+        for bucket, key in zip(self.buckets, keys):
+            bucket.setdefault(key, []).append(pageId)
+        return None
+
+#SentenceDeduplicator drops sentences whose normalized text was seen before
+#Sentences are compared case-insensitively with white space collapsed; only 64-bit hashes are kept
+class SentenceDeduplicator:
+    def __init__(self):
+        self.hashes = set()
+        self.dropped = 0
+
+    #Yield the sentences that weren't seen before
+    def unique(self, sentences):
+        for sent in sentences:
+            h = hashText(" ".join(sent.lower().split()))
+            if h in self.hashes:
+                self.dropped += 1
+                continue
+            self.hashes.add(h)
+            yield sent
+
+#Deduplicator combines page-level and sentence-level duplicate detection for the crawler pipeline
+class Deduplicator:
+    def __init__(self, threshold=0.8, numPerm=64, bands=16, shingleSize=5):
+        self.pages = PageDeduplicator(threshold, numPerm, bands, shingleSize)
+        self.sentences = SentenceDeduplicator()
+
+    #Return the page's unique sentences, or None if the whole page is a near-duplicate of an earlier one
+    def filter(self, sentences):
+        if self.pages.check(" ".join(sentences)) is not None:
+            return None
+        return list(self.sentences.unique(sentences))
+
+    #Dropped page and sentence counters
+    def stats(self):
+        return {"pages_dropped": self.pages.dropped, "sentences_dropped": self.sentences.dropped}
@@ -0,0 +1,67 @@
+#Sentence-level inverted index over the cleaned sites
+#Maps every token to the ids of the sentences that contain it; sentence ids grow in site order, then sentence order
+#Fact lookup reads a postings list and stops after the requested amount of facts
+#Multi-term queries return the sentences that contain every term
+
+import re
+from array import array
+from bisect import bisect_left
+
+#Tokens are runs of word characters; matching is case-sensitive like the original substring search
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class InvertedIndex:
+    def __init__(self):
+        self.postings = {} #token: array of sentence ids in ascending order
+        self.sentences = [] #sentence id: sentence
+        self.sentenceSites = array('I') #sentence id: site id
+        self.urls = [] #site id: URL
+
+    #Add a site's sentences to the index; returns the site id
+    def addDocument(self, url, sentences):
+        siteId = len(self.urls)
+        self.urls.append(url)
+
+        for sent in sentences:
+            sentId = len(self.sentences)
+            self.sentences.append(sent)
+            self.sentenceSites.append(siteId)
+            for token in set(TOKEN_PATTERN.findall(sent)):
+                ids = self.postings.get(token)
+                if ids is None:
+                    ids = self.postings[token] = array('I')
+                ids.append(sentId)
+        return siteId
+
+    #Return the ids of the sentences containing every token of the query, up to limit
+    def _match(self, query, limit=None):
+        tokens = TOKEN_PATTERN.findall(query) if isinstance(query, str) else list(query)
+        if not tokens:
+            return []
+
+        lists = [self.postings.get(token) for token in set(tokens)]
+        if any(ids is None for ids in lists):
+            return []
+
+        #Walk the shortest postings list and binary search the others
+        lists.sort(key=len)
+        matches = []
+        for sentId in lists[0]:
+            if all(_contains(ids, sentId) for ids in lists[1:]):
+                matches.append(sentId)
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    #Return up to limit sentences containing the query term(s)
+    def lookup(self, query, limit=None):
+        return [self.sentences[i] for i in self._match(query, limit)]
+
+    #Return up to limit (sentence, source URL) pairs containing the query term(s)
+    def lookupWithSources(self, query, limit=None):
+        return [(self.sentences[i], self.urls[self.sentenceSites[i]]) for i in self._match(query, limit)]
+
+#True if a sorted postings list contains a sentence id
+def _contains(ids, sentId):
+    idx = bisect_left(ids, sentId)
+    return idx < len(ids) and ids[idx] == sentId
@@ -0,0 +1,124 @@
+#Asynchronous fetch layer for the web crawler
+#Downloads pages concurrently through one bounded connection pool with a per-host limit, timeouts and retries
+#Each page is downloaded once; the body is handed to later steps so no page is requested twice
+#With an http_cache.ResponseCache, cached pages are revalidated with conditional requests and unchanged ones skip the download
+#Note: Must install aiohttp via pip
+
+import asyncio
+import aiohttp
+
+#Statuses worth retrying: rate limits and temporary server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+#Result of fetching one URL; status is None when the request failed without a response
+#url is the requested URL; finalUrl is where redirects ended up
+class FetchResult:
+    def __init__(self, url, status=None, body=b"", headers=None, error=None, finalUrl=None, fromCache=False):
+        self.url = url
+        self.fromCache = fromCache
+        self.finalUrl = finalUrl or url
+        self.status = status
+        self.body = body
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()} #Header names are case-insensitive
+        self.error = error
+
+    #A page is valid if the server answered without an error status
+    @property
+    def ok(self):
+        return self.status is not None and self.status < 400
+
+    #Decode the body with the charset the server reported
+    def text(self):
+        charset = "utf-8"
+        contentType = self.headers.get("content-type", "")
+        if "charset=" in contentType:
+            charset = contentType.split("charset=")[-1].split(";")[0].strip() or charset
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+#AsyncFetcher shares one aiohttp session across all requests
+#concurrency bounds the whole connection pool; perHost bounds connections to a single host
+class AsyncFetcher:
+    def __init__(self, concurrency=20, perHost=4, timeout=15, retries=2, backoff=0.5, headers=None, cache=None):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.perHost = perHost
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or {'User-Agent': 'Mozilla/5.0'}
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.perHost)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    #Fetch one URL; retries connection errors, timeouts and temporary server errors with exponential backoff
+    #Error statuses such as 404 are returned, not raised, so callers can validate pages from the same response
+    async def fetch(self, url, headers=None):
+        entry = self.cache.lookup(url) if self.cache is not None else None
+
+        #Serve recent cache entries without a request
+        if entry is not None and self.cache.isFresh(entry):
+            self.cache.hits += 1
+            return self._cachedResult(url, entry)
+
+        requestHeaders = dict(headers or {})
+        if entry is not None:
+            requestHeaders.update(self.cache.conditionalHeaders(entry))
+
+        result = await self._fetchNetwork(url, requestHeaders)
+
+        if self.cache is not None:
+            #304 Not Modified: the cached body is still current
+            if result.status == 304 and entry is not None:
+                self.cache.revalidated += 1
+                return self._cachedResult(url, entry, revalidated=True)
+            if result.status == 200:
+                self.cache.misses += 1
+                self.cache.store(url, result.status, result.body, result.headers)
+
+        return result
+
+    #Build a result from a cache entry
+    def _cachedResult(self, url, entry, revalidated=False):
+        body = self.cache.loadBody(entry, revalidated)
+        return FetchResult(url, entry["status"], body, {"content-type": entry["content_type"] or ""}, fromCache=True)
+
+    #Request a URL over the network with retries
+    async def _fetchNetwork(self, url, headers):
+        result = None
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    body = await response.read()
+                    result = FetchResult(url, response.status, body, dict(response.headers), finalUrl=str(response.url))
+                if result.status not in RETRY_STATUSES:
+                    return result
+            except ValueError as e:
+                #Permanent: malformed URLs (aiohttp.InvalidURL is also a ValueError) fail the same way on every attempt
+                return FetchResult(url, error=repr(e))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result = FetchResult(url, error=repr(e))
+        return result
+
+    #Fetch many URLs concurrently; results come back in the order of the URLs
+    async def fetchAll(self, urls):
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+#Synchronous helper that fetches a list of URLs with a temporary fetcher
+def fetchAll(urls, **fetcherArgs):
+    async def run():
+        async with AsyncFetcher(**fetcherArgs) as fetcher:
+            return await fetcher.fetchAll(urls)
+    return asyncio.run(run())
@@ -0,0 +1,127 @@
+#On-disk HTTP response cache for the crawler
+#Responses are indexed by URL in a small SQLite table that records ETag/Last-Modified validators
+#Bodies are stored zlib-compressed under the SHA-256 of their content, so identical pages are stored once
+#Re-crawls revalidate with conditional requests; unchanged pages come back as 304 without a body
+#The least recently used entries are evicted once the stored bodies exceed maxBytes
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+
+class ResponseCache:
+    def __init__(self, cacheDir="http_cache", maxBytes=200*1024*1024, freshFor=0):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.freshFor = freshFor #Seconds a cached page is served without contacting the server at all
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(os.path.join(cacheDir, "bodies"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cacheDir, "index.db"))
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                               url TEXT PRIMARY KEY,
+                               status INTEGER,
+                               etag TEXT,
+                               last_modified TEXT,
+                               content_type TEXT,
+                               body_hash TEXT,
+                               size INTEGER,
+                               fetched_at REAL,
+                               accessed_at REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        self.db.commit()
+
+    #Path of a stored body
+    def _bodyPath(self, bodyHash):
+        return os.path.join(self.cacheDir, "bodies", bodyHash[:2], bodyHash + ".z")
+
+    #Return the cached entry of a URL as a dictionary, or None
+    def lookup(self, url):
+        row = self.db.execute("SELECT url, status, etag, last_modified, content_type, body_hash, size, fetched_at FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ["url", "status", "etag", "last_modified", "content_type", "body_hash", "size", "fetched_at"]
+        entry = dict(zip(keys, row))
+        if not os.path.exists(self._bodyPath(entry["body_hash"])):
+            return None
+        return entry
+
+    #True if the entry is recent enough to use without revalidation
+    def isFresh(self, entry):
+        return self.freshFor > 0 and time.time() - entry["fetched_at"] < self.freshFor
+
+    #Request headers that ask the server to answer 304 if the page hasn't changed
+    def conditionalHeaders(self, entry):
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    #Load and decompress a cached body; marks the entry as recently used
+    def loadBody(self, entry, revalidated=False):
+        with open(self._bodyPath(entry["body_hash"]), 'rb') as f:
+            body = zlib.decompress(f.read())
+
+        now = time.time()
+        if revalidated:
+            self.db.execute("UPDATE entries SET accessed_at = ?, fetched_at = ? WHERE url = ?", (now, now, entry["url"]))
+        else:
+            self.db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, entry["url"]))
+        self.db.commit()
+        return body
+
+    #Store a response; headers use lower-case names
+    def store(self, url, status, body, headers):
+        bodyHash = hashlib.sha256(body).hexdigest()
+        path = self._bodyPath(bodyHash)
+
+        #Content-addressed: only write bodies that aren't stored yet
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmpPath = path + ".tmp"
+            with open(tmpPath, 'wb') as f:
+                f.write(zlib.compress(body, 6))
+            os.replace(tmpPath, path)
+
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, status, headers.get("etag"), headers.get("last-modified"), headers.get("content-type"),
+                         bodyHash, os.path.getsize(path), now, now))
+        self.db.commit()
+        self.evict()
+
+    #Total size of the distinct stored bodies
+    def totalBytes(self):
+        row = self.db.execute("SELECT SUM(size) FROM (SELECT DISTINCT body_hash, size FROM entries)").fetchone()
+        return row[0] or 0
+
+    #Remove least recently used entries until the stored bodies fit in maxBytes
+    def evict(self):
+        total = self.totalBytes()
+        if total <= self.maxBytes:
+            return
+
+        for url, bodyHash in self.db.execute("SELECT url, body_hash FROM entries ORDER BY accessed_at").fetchall():
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+
+            #Delete the body once no other URL refers to it
+            if self.db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (bodyHash,)).fetchone() is None:
+                path = self._bodyPath(bodyHash)
+                if os.path.exists(path):
+                    total -= os.path.getsize(path)
+                    os.remove(path)
+            if total <= self.maxBytes:
+                break
+        self.db.commit()
+
+    #Hit, revalidation and miss counters
+    def stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses, "bytes": self.totalBytes()}
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,112 @@
+#Persistent knowledge-base store backed by SQLite
+#Terms, facts and their source URLs are kept in indexed tables, so one term can be read without loading the whole knowledge base
+#Facts are upserted, so repeated crawls add new facts and refresh existing ones instead of rebuilding the store
+#Full-text search over the facts uses an FTS5 index when SQLite provides it, and a LIKE scan otherwise
+
+import time
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY,
+    term_id INTEGER NOT NULL REFERENCES terms(id),
+    fact TEXT NOT NULL,
+    source_id INTEGER REFERENCES sources(id),
+    updated_at REAL NOT NULL,
+    UNIQUE(term_id, fact)
+);
+"""
+
+#External-content FTS5 table kept in sync with the facts table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(fact, content='facts', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS facts_ai AFTER INSERT ON facts BEGIN
+    INSERT INTO facts_fts(rowid, fact) VALUES (new.id, new.fact);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_ad AFTER DELETE ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, fact) VALUES ('delete', old.id, old.fact);
+END;
+CREATE TRIGGER IF NOT EXISTS facts_au AFTER UPDATE OF fact ON facts BEGIN
+    INSERT INTO facts_fts(facts_fts, rowid, fact) VALUES ('delete', old.id, old.fact);
+    INSERT INTO facts_fts(rowid, fact) VALUES (new.id, new.fact);
+END;
+"""
+
+class KnowledgeBaseStore:
+    def __init__(self, dbPath="knowledge_base.db"):
+        self.db = sqlite3.connect(dbPath)
+        self.db.executescript(SCHEMA)
+        try:
+            self.db.executescript(FTS_SCHEMA)
+            self.hasFts = True
+        except sqlite3.OperationalError:
+            self.hasFts = False #SQLite was built without FTS5
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    #Return the id of a row with a unique text column, inserting it if needed
+    def _rowId(self, table, column, value):
+        self.db.execute("INSERT OR IGNORE INTO " + table + " (" + column + ") VALUES (?)", (value,))
+        return self.db.execute("SELECT id FROM " + table + " WHERE " + column + " = ?", (value,)).fetchone()[0]
+
+    #Add or refresh the facts of a term; facts is a list of (fact, source URL) pairs
+    #A term with no facts is still recorded, so it shows up in terms()
+    def upsertFacts(self, term, facts):
+        now = time.time()
+        with self.db:
+            termId = self._rowId("terms", "term", term)
+            for fact, url in facts:
+                sourceId = self._rowId("sources", "url", url) if url else None
+                self.db.execute("""INSERT INTO facts (term_id, fact, source_id, updated_at) VALUES (?, ?, ?, ?)
+                                   ON CONFLICT(term_id, fact) DO UPDATE SET source_id = excluded.source_id, updated_at = excluded.updated_at""",
+                                (termId, fact, sourceId, now))
+
+    #Return every stored term in alphabetical order
+    def terms(self):
+        return [row[0] for row in self.db.execute("SELECT term FROM terms ORDER BY term")]
+
+    #Lazily yield (fact, source URL) pairs of one term in insertion order
+    def facts(self, term, limit=None):
+        query = """SELECT facts.fact, sources.url FROM facts
+                   JOIN terms ON terms.id = facts.term_id
+                   LEFT JOIN sources ON sources.id = facts.source_id
+                   WHERE terms.term = ? ORDER BY facts.id"""
+        params = [term]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        yield from self.db.execute(query, params)
+
+    #Search every fact for the given words; yields (term, fact, source URL)
+    def search(self, query, limit=20):
+        if self.hasFts:
+            #Quote each word so FTS5 treats the query as plain terms that must all appear
+            ftsQuery = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+            rows = self.db.execute("""SELECT terms.term, facts.fact, sources.url FROM facts_fts
+                                      JOIN facts ON facts.id = facts_fts.rowid
+                                      JOIN terms ON terms.id = facts.term_id
+                                      LEFT JOIN sources ON sources.id = facts.source_id
+                                      WHERE facts_fts MATCH ? ORDER BY rank LIMIT ?""", (ftsQuery, limit))
+        else:
+            rows = self.db.execute("""SELECT terms.term, facts.fact, sources.url FROM facts
+                                      JOIN terms ON terms.id = facts.term_id
+                                      LEFT JOIN sources ON sources.id = facts.source_id
+                                      WHERE facts.fact LIKE ? LIMIT ?""", ("%" + query + "%", limit))
+        yield from rows
@@ -0,0 +1,76 @@
+#Sparse TF-IDF engine for the crawled documents
+#Documents are stored as one CSR document-term matrix (row pointers, term ids, values) over a shared vocabulary index
+#Document frequencies are counted for the whole matrix at once and the top terms of each document are found with partial selection
+#Formulas of the original webcrawler.py: tf = count / document length, idf = log(1 + docs / (1 + document frequency))
+#Note: Must install numpy via pip
+
+from collections import Counter
+from array import array
+import numpy as np
+
+class TfidfEngine:
+    def __init__(self):
+        self.vocab = {} #term: id
+        self.terms = [] #id: term
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.tf = np.zeros(0)
+        self.idf = np.zeros(0)
+        self.tfidf = np.zeros(0)
+
+    #Build the document-term matrix from a list of token lists and compute the TF-IDF scores
+    def fit(self, tokenLists):
+        indptr = array('q', [0])
+        indices = array('q')
+        tf = array('d')
+
+        for tokens in tokenLists:
+            counts = Counter(tokens)
+            tokenAmt = len(tokens)
+            for term, count in counts.items():
+                termId = self.vocab.get(term)
+                if termId is None:
+                    termId = self.vocab[term] = len(self.terms)
+                    self.terms.append(term)
+                indices.append(termId)
+                tf.append(count / tokenAmt)
+            indptr.append(len(indices))
+
+        self.indptr = np.frombuffer(indptr, dtype=np.int64)
+        self.indices = np.frombuffer(indices, dtype=np.int64)
+        self.tf = np.frombuffer(tf, dtype=np.float64)
+
+        #Each (document, term) pair appears once, so counting term ids gives the document frequency
+        docAmt = len(self.indptr) - 1
+        df = np.bincount(self.indices, minlength=len(self.terms))
+        self.idf = np.log(1 + docAmt / (1 + df))
+        self.tfidf = self.tf * self.idf[self.indices]
+        return self
+
+    #Amount of documents in the matrix
+    @property
+    def docAmt(self):
+        return len(self.indptr) - 1
+
+    #Return the k highest scoring (term, score) pairs of one document, best first; ties go to the term that occurs first
+    def topTermsOf(self, docIdx, k):
+        start, end = self.indptr[docIdx], self.indptr[docIdx + 1]
+        scores = self.tfidf[start:end]
+        if len(scores) > k:
+            #Partial selection of the k-th best score; every term scoring at least that much is kept, including all ties,
+            #so the stable sort below can give ties to the term that occurs first in the document
+            kth = -np.partition(-scores, k - 1)[k - 1]
+            best = np.flatnonzero(scores >= kth)
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")][:k]
+        return [(self.terms[self.indices[start + i]], float(scores[i])) for i in best]
+
+    #Return the top k terms of every document
+    def topTerms(self, k):
+        return [[term for term, _ in self.topTermsOf(d, k)] for d in range(self.docAmt)]
+
+    #Return the TF-IDF dictionary of one document as term: score
+    def docScores(self, docIdx):
+        start, end = self.indptr[docIdx], self.indptr[docIdx + 1]
+        return {self.terms[t]: float(s) for t, s in zip(self.indices[start:end], self.tfidf[start:end])}
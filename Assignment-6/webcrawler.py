@@ -1,185 +1,167 @@
 #Script extracts data from sites on a given subject, which in this case is the San Francisco Bay Area
 #Uses Beautiful Soup to perform web scraping
-#Performs preprocessing on text 
-#Calculates token popularity with tf-idf metric; score is used for finding top terms in the sites
-#Generates a knowledge base by iterating through sites and extracting facts for each term
-#Note: Must install nltk, bs4 via pip
-
-from nltk import word_tokenize
-import pickle
-from bs4 import BeautifulSoup
-import requests
-import urllib.request
+#Performs preprocessing on text; pages stream from the crawler through scraping and cleaning and only the final sentences are saved
+#Calculates token popularity with tf-idf metric on a sparse document-term matrix; score is used for finding top terms in the sites
+#Generates a knowledge base by looking up facts for each term in a sentence-level inverted index
+#Saves the knowledge base to knowledge_base.db, a SQLite store that can be read one term at a time (see kb_store.py)
+#Pages are crawled by crawler.FrontierCrawler and downloaded concurrently by fetcher.AsyncFetcher; each page is downloaded once
+#Responses are kept in the http_cache directory; re-crawls only download pages that changed
+#Near-duplicate pages and repeated sentences are dropped before indexing and tf-idf (see dedup.py)
+#Note: Must install nltk, bs4, aiohttp via pip
+
+import os
+import sys
+import asyncio
+import json
+from bs4 import BeautifulSoup, Tag, NavigableString
+from fetcher import AsyncFetcher
+from http_cache import ResponseCache
+from tfidf import TfidfEngine
+from fact_index import InvertedIndex
+from kb_store import KnowledgeBaseStore
+from crawler import FrontierCrawler
+from dedup import Deduplicator
 import re
-from nltk.tokenize import sent_tokenize
-from nltk.corpus import stopwords
-import math
+
+#Shared NLP resources live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from nlp_resources import sentences as sent_tokenize, wordTokens, stopWords, ensureResources
 
 
 
 #Crawl the website with given starter URL; extract relevant URLs and outputs a list
-def webCrawl(starter_URL, link_amt):
-    response = requests.get(starter_URL)
-    soup = BeautifulSoup(response.text, features="html.parser")
-    linkArr = [starter_URL]
-    i = 1
-
-    #Iterate through a tags
-    for link in soup.find_all("a"):
-        if i >= link_amt:
-            break
-        link_res = str(link.get('href'))
-        if 'bay' in link_res or 'area' in link_res:
-            if '&' in link_res:
-                idx = link_res.find('&')
-                link_res = link_res[:idx]
-            if link_res.startswith('http') and 'google' not in link_res and 'pdf' not in link_res and 'web.archive' not in link_res: 
-                if checkValidSite(link_res):
-                    linkArr.append(link_res)
-                    i += 1
+#Uses the frontier crawler: links are deduplicated, fetched concurrently with per-host politeness and robots.txt rules,
+#and followed up to max_depth levels from the starter page; pass a checkpoint path to make the crawl resumable
+#Each valid page is handed to onPage(url, body) as soon as it is fetched, so pages are processed while the crawl goes on
+#and no page body is kept; pages crawled before a resumed crawl's checkpoint are fetched again (usually from the cache)
+#Returns the list of links in the order they were discovered
+def webCrawl(starter_URL, link_amt, fetcherArgs=None, max_depth=1, checkpointPath=None, onPage=None):
+    return asyncio.run(crawlLinks(starter_URL, link_amt, fetcherArgs or {}, max_depth, checkpointPath, onPage))
+
+#Keep links on the subject; returns the link to follow or None
+def relevantLink(link_res, pageUrl=None):
+    if 'bay' in link_res or 'area' in link_res:
+        if '&' in link_res:
+            idx = link_res.find('&')
+            link_res = link_res[:idx]
+        if link_res.startswith('http') and 'google' not in link_res and 'pdf' not in link_res and 'web.archive' not in link_res: 
+            return link_res
+    return None
+
+#Async part of webCrawl
+async def crawlLinks(starter_URL, link_amt, fetcherArgs, max_depth, checkpointPath, onPage):
+    handedOver = set()
+    def handOver(url, body):
+        handedOver.add(url)
+        if onPage is not None:
+            onPage(url, body)
+
+    async with AsyncFetcher(**fetcherArgs) as fetcher:
+        crawler = FrontierCrawler(fetcher, [starter_URL], maxDepth=max_depth, maxPages=link_amt,
+                                  linkFilter=relevantLink, checkpointPath=checkpointPath, onPage=handOver)
+        linkArr = await crawler.run()
+
+        #Links restored from a checkpoint were fetched in an earlier run; hand them over as they download
+        missing = [url for url in linkArr if url not in handedOver] if onPage is not None else []
+        for future in asyncio.as_completed([fetcher.fetch(url) for url in missing]):
+            result = await future
+            if result.ok:
+                handOver(result.url, result.body)
+
     return linkArr
 
-#Some source sites on Wikipedia are outdated, so they'll return a 404 status error
-#checkValidSite verifies if page still exist
-def checkValidSite(URL):
-    flag = True
-    req = urllib.request.Request(url=URL, headers={'User-Agent': 'Mozilla/5.0'})
-    try:
-        html = urllib.request.urlopen(req).read()  
-    except urllib.request.HTTPError as e:
-        if e.getcode() == 404:
-            flag = False
-        else:
-            raise 
-    return flag
-
-#helper function
-def visible(element):
-    if element.parent.name in ['style', 'script', '[document]', 'head', 'title']:
-        return False
-    elif re.match('<!--.*-->', str(element.encode('utf-8'))):
-        return False
-    return True
-
-#Scrape the raw data from the URLs and save it as pickle files
-def scrapeText(linkArr):
-    for i in range(len(linkArr)):
-        fileName = "site_" + str(i+1) + ".p"
-        req = urllib.request.Request(url=linkArr[i], headers={'User-Agent': 'Mozilla/5.0'})
-
-        html = urllib.request.urlopen(req).read()
-        soup = BeautifulSoup(html, features="html.parser")
-        data = soup.findAll(string=True)
-        result = list(filter(visible, data))
-        data_str = ' '.join(result)
-        pickle.dump(data_str, open(fileName, 'wb'))
-
-#Preprocess documents and clean them
-def cleanText(site_amt):
+#Tags whose text is never shown on the page
+HIDDEN_TAGS = {'style', 'script', 'head', 'title'}
+
+#Extract the visible text of a page in a single walk over the parse tree
+#Hidden subtrees are skipped whole; comments, doctypes and other special strings are never collected
+def visibleText(html):
+    soup = BeautifulSoup(html, features="html.parser")
+    parts = []
+    stack = [iter(soup.children)]
+
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        elif isinstance(child, Tag):
+            if child.name not in HIDDEN_TAGS:
+                stack.append(iter(child.children))
+        elif type(child) is NavigableString:
+            parts.append(child)
+
+    return ' '.join(parts)
+
+#Preprocess a document's raw text and yield its clean sentences
+def cleanText(data):
     punctuationList = [".", "!", "?"]
     removeList = ["/", "//", "|", "Google Tag"] #Some sites contain links or analytic tools 
 
-    #Iterate through raw text and clean it 
-    for i in range(site_amt):
-        fileName = "site_" + str(i+1) + ".p"
-        cleanFileName = "clean_" + fileName[:-2] + ".txt"
-        data = pickle.load(open(fileName, 'rb'))
-        #Remove new lines, tab characters, and Wikipedia's [] entries (ex: [13], [edit])
-        clean_data = re.sub('\n|\t|\[[^\]]*\]', '', data)
-        sentences = sent_tokenize(clean_data)
-
-        with open(cleanFileName, "w", encoding="utf-8") as file:
-            for sent in sentences:
-                sent = " ".join(sent.split()) #Remove extra white spaces
-                #Check if sentence contains valid characters and ends in punctuation marks
-                if len(sent) > 0 and sent[-1] in punctuationList and not any(x in sent for x in removeList):
-                    file.write(sent+"\n")
+    #Remove new lines, tab characters, and Wikipedia's [] entries (ex: [13], [edit])
+    clean_data = re.sub('\n|\t|\[[^\]]*\]', '', data)
+    sentences = sent_tokenize(clean_data)
+
+    for sent in sentences:
+        sent = " ".join(sent.split()) #Remove extra white spaces
+        #Check if sentence contains valid characters and ends in punctuation marks
+        if len(sent) > 0 and sent[-1] in punctuationList and not any(x in sent for x in removeList):
+            yield sent
+
+#SentenceStore streams pages through scraping and cleaning and saves the sentences as one JSON line per site
+#Pages are added while the crawler fetches them; only the final sentences are written, the HTML is never kept
+#Sentences are added to the inverted index while cleaning, if one is given
+#With a deduplicator, near-duplicate sites are skipped and sentences seen on an earlier site are dropped
+#Sites are stored in the order their pages finished downloading
+class SentenceStore:
+    def __init__(self, storePath="sentences.jsonl", index=None, dedup=None):
+        self.file = open(storePath, "w", encoding="utf-8")
+        self.index = index
+        self.dedup = dedup
+        self.docAmt = 0
+
+    #Scrape, clean and save one page; used as the crawler's onPage callback
+    def addPage(self, url, body):
+        sentences = list(cleanText(visibleText(body)))
+        if self.dedup is not None:
+            sentences = self.dedup.filter(sentences)
+            if sentences is None:
+                return
+        self.file.write(json.dumps({"url": url, "sentences": sentences}) + "\n")
+        self.docAmt += 1
+        if self.index is not None:
+            self.index.addDocument(url, sentences)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#Load the documents saved by SentenceStore one at a time
+def loadSentenceStore(storePath="sentences.jsonl"):
+    with open(storePath, "r", encoding="utf-8") as file:
+        for line in file:
+            yield json.loads(line)
 
 
 #Tokenize document; remove stop words and punctuations
 def createTokens(doc):
-    tokens = word_tokenize(doc.lower())
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [t for t in tokens if t.isalpha()  and t not in stop_words]
+    tokens = wordTokens(doc.lower())
+    stop_words = stopWords()
+    filtered_tokens = [t for t in tokens if t.isalpha() and t not in stop_words]
     return filtered_tokens
 
-#Create a TF dictionary; term frequency is calculated by dividing token count by total amount of tokens
-#Entries are token: result from tf formula
-def createTFDict(filtered_tokens):
-    tf_dict = dict.fromkeys(set(filtered_tokens), 0)
-
-    for t in filtered_tokens:
-        tf_dict[t] += 1
-    
-    for key in tf_dict.keys():
-        tf_dict[key] = tf_dict[key] / len(filtered_tokens)
-    return tf_dict
-
-#Create an inverse dependency dictionary with TF dictionaries and corpus
-#Used for penalizing words that occur in multiple documents
-#Entries are token: result from idf formula
-def createIDFDict(TFDictArr, vocab):
-
-    #Create a list of keys from the TF dictionaries
-    vocab_keys = [dict.keys() for dict in TFDictArr]
-    idf_dict = {}
-    
-    #Iterate throuch each token in vocabulary
-    for word in vocab:
-
-        #Count the number of docs that contain at least one instance of the token
-        tmp_amt = len(['x' for keys in vocab_keys if word in keys])
-
-        #Apply log function and divide total number of docs by the earlier occurence variable
-        #Add 1 to numerator and denominator to avoid negative result and division by 0
-        idf_dict[word] = math.log((1+len(TFDictArr)/(1+tmp_amt)))
-
-    return idf_dict
-
-#Create a TF-IDF dictionary for each site 
-#Calculate the TF-IDF score for the site's tokens; combine both TF and IDF to get final score of tokens
-#Sort the dictionary with respect to score
-#Entries are token: tf-idf score
-def createTFIDFDict(tf, idf):
-    tf_idf = {}
-    
-    for key in tf.keys():
-        tf_idf[key] = tf[key] * idf[key]
-    
-    return dict(sorted(tf_idf.items(), key=lambda x:x[1], reverse=True))
-
 #Create a list of popular terms from the sites; uses tf-idf metric to calculate each token's score
-def createTermList(site_amt):
-    vocab = []
-    TFDictArr = []
-    termList = []
-
-    #Iterate through cleaned sites and create a TF dictionary
-    #Create a corpus of tokens from the sites
-    for i in range(site_amt):
-        fileName = "clean_site_" + str(i+1) + ".txt"
-        with open(fileName, 'r', encoding="utf-8") as f:
-            doc = f.read()
-            tokens = createTokens(doc)
-            temp_dict = createTFDict(tokens)
-            vocab.extend(tokens)
-            TFDictArr.append(temp_dict)
-    
-    #Create a IDF dictionary 
-    IDF_dict =createIDFDict(TFDictArr, vocab)
-    
-    #Iterate through the TF dictionaries
-    for dictionary in TFDictArr:
+#Scores come from the sparse TfidfEngine (see tfidf.py); ties for a site's last top spot go to the term that occurs first on the site
+def createTermList(docs, top_amt=3):
+    #Tokenize every site and build the document-term matrix
+    engine = TfidfEngine().fit(createTokens("\n".join(doc["sentences"])) for doc in docs)
 
-        #Create the TF-IDF dictionary
-        TF_IDF_dict = createTFIDFDict(dictionary, IDF_dict)
-
-        #Extract the top 3 terms from each site and append them to the list of terms
-        for tup in list(TF_IDF_dict.items())[:3]:
-            termList.append(tup[0])
-    
-    #Apply set operations to remove redundant terms
-    termList = list(set(termList))
+    #Extract the top terms from each site; apply set operations to remove redundant terms
+    termList = list(set(term for terms in engine.topTerms(top_amt) for term in terms))
     
     #Display the list of top terms
     print("Top " + str(len(termList)) + " Terms:")
@@ -190,30 +172,18 @@ def createTermList(site_amt):
 
 
 #Populate a knowledge base dictionary with facts from the cleaned sites; save N facts for each term
+#Facts are read from the inverted index built during cleaning; lookup stops after term_fact_amt facts
 #Entries are term: array of string facts
-def createKnowledgeBase(knowledgeBase, site_amt, term_fact_amt):
+def createKnowledgeBase(knowledgeBase, index, term_fact_amt):
     for term in knowledgeBase:
-        fact_counter = 0
-
-        for i in range(site_amt):
-            fileName = "clean_site_" + str(i+1) + ".txt"
-            with open(fileName, 'r', encoding="utf-8") as f:
-                lines = f.read().splitlines()
-                for line in lines:
-                    #Add fact to knowledge base if sentence contains term
-                    if term in line:
-                        knowledgeBase[term].append(line)
-                        fact_counter += 1
-                    
-                    if fact_counter >= term_fact_amt:
-                        break
-
-            if fact_counter >= term_fact_amt:
-                break
+        knowledgeBase[term].extend(index.lookup(term, term_fact_amt))
 
     return knowledgeBase
 
 def main():
+    #Stop before crawling if the NLTK data used for cleaning and tf-idf is missing
+    ensureResources("punkt", "stopwords")
+
     starter_URL = "https://en.wikipedia.org/wiki/San_Francisco_Bay_Area"
     
     #Define the amount of URLS to extract
@@ -222,24 +192,29 @@ def main():
     #Define the number of facts per term
     term_fact_amt = 3
 
-    #Generate the list of links
-    linkArr = webCrawl(starter_URL, site_amt)
-    
-    #Save the site's content as raw text files
-    scrapeText(linkArr)
-
-    #Load raw text files; clean them; and save them as cleaned files
-    cleanText(site_amt)
+    #Cache responses between runs; unchanged pages are revalidated instead of downloaded again
+    cache = ResponseCache("http_cache")
+    fetcherArgs = {"cache": cache}
+
+    #Crawl the sites; each page is scraped and cleaned as soon as it arrives, and only its final sentences are saved and indexed
+    #Duplicate sites and sentences are dropped first, so they don't inflate document frequencies or repeat facts
+    index = InvertedIndex()
+    dedup = Deduplicator()
+    with SentenceStore(index=index, dedup=dedup) as store:
+        linkArr = webCrawl(starter_URL, site_amt, fetcherArgs, onPage=store.addPage)
+    print("HTTP cache:", cache.stats())
+    print("Duplicates:", dedup.stats())
+    cache.close()
     
-    #Perform tf-idf calculations and return a list of top terms
-    termList = createTermList(site_amt)
+    #Perform tf-idf calculations on the saved sentences and return a list of top terms
+    termList = createTermList(loadSentenceStore())
 
     #Use domain knowledge to select top ten terms from the list of terms
     knowledgeBase = {"California": [], "war": [], "town": [], "museum": [], "Francisco": [],
                       "Bay": [], "downtown": [], "shipyards": [], "data": [], "Alviso": []}
  
-    #Find facts in the cleaned site files and saved them to the relevant keys
-    knowledgeBase = createKnowledgeBase(knowledgeBase, site_amt, term_fact_amt)
+    #Find facts in the sentence index and saved them to the relevant keys
+    knowledgeBase = createKnowledgeBase(knowledgeBase, index, term_fact_amt)
 
     #Print knowledge base for the top ten terms
     print("\n\nKnowledge Base:\n\n")
@@ -251,8 +226,10 @@ def main():
 
         print("\n")
     
-    #Save knowledge base dictionary as a pickle file 
-    pickle.dump(knowledgeBase, open("knowledge_base.p", 'wb'))
+    #Save the facts with their source URLs in the knowledge-base store; facts from earlier crawls are kept
+    with KnowledgeBaseStore("knowledge_base.db") as store:
+        for term in knowledgeBase:
+            store.upsertFacts(term, index.lookupWithSources(term, term_fact_amt))
 
 if __name__ == '__main__':
     main()
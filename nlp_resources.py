@@ -0,0 +1,198 @@
+#Shared NLP resources for the assignment scripts
+#NLTK is imported on first use instead of at startup, and the stopword set and WordNet lemmatizer are built once per process
+#Lemmas are memoized in an LRU cache, so repeated words are lemmatized once
+#Scripts in the assignment folders add the repository root to sys.path before importing this module
+
+#Each loader first checks that the NLTK data it needs is installed; a missing resource raises MissingResourceError
+#right away with the download command, instead of failing deep inside NLTK. Nothing is ever downloaded at runtime
+#Set NLP_RESOURCES_TIMING=1 to print how long each import and resource load took when the program exits
+#Note: Must install nltk via pip
+
+import os
+import re
+import sys
+import time
+import atexit
+from contextlib import contextmanager
+from functools import lru_cache
+
+#Amount of (word, POS) pairs kept in the lemma cache
+LEMMA_CACHE_SIZE = 65536
+
+#NLTK data each tool needs: name: (download id, path inside nltk_data)
+RESOURCES = {
+    "punkt": ("punkt", "tokenizers/punkt"),
+    "stopwords": ("stopwords", "corpora/stopwords"),
+    "wordnet": ("wordnet", "corpora/wordnet"),
+    "tagger": ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger"),
+    "sentiwordnet": ("sentiwordnet", "corpora/sentiwordnet"),
+    "gutenberg": ("gutenberg", "corpora/gutenberg"),
+    "inaugural": ("inaugural", "corpora/inaugural"),
+}
+
+#From NLTK 3.9 on, word_tokenize only loads punkt_tab and pos_tag only loads averaged_perceptron_tagger_eng
+NEW_RESOURCES_VERSION = (3, 9)
+NEW_RESOURCES = {
+    "punkt": ("punkt_tab", "tokenizers/punkt_tab"),
+    "tagger": ("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng"),
+}
+
+#Seconds spent in each import or resource load, in the order they happened
+IMPORT_TIMES = {}
+
+#Raised when NLTK data a tool needs isn't installed
+class MissingResourceError(LookupError):
+    pass
+
+#Record how long the block takes under the given label
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMPORT_TIMES[label] = IMPORT_TIMES.get(label, 0.0) + time.perf_counter() - start
+
+#Directories NLTK searches for its data
+#Uses nltk.data.path once NLTK is imported; before that the same default list is built without importing NLTK
+def dataDirs():
+    if "nltk.data" in sys.modules:
+        return list(sys.modules["nltk.data"].path)
+
+    dirs = [d for d in os.environ.get("NLTK_DATA", "").split(os.pathsep) if d]
+    dirs.append(os.path.expanduser("~/nltk_data"))
+    if sys.platform.startswith("win"):
+        dirs += [os.path.join(sys.prefix, "nltk_data"), os.path.join(sys.prefix, "share", "nltk_data"),
+                 os.path.join(sys.prefix, "lib", "nltk_data"), os.path.join(os.environ.get("APPDATA", "C:\\"), "nltk_data"),
+                 r"C:\nltk_data", r"D:\nltk_data", r"E:\nltk_data"]
+    else:
+        dirs += [os.path.join(sys.prefix, "nltk_data"), os.path.join(sys.prefix, "share", "nltk_data"),
+                 os.path.join(sys.prefix, "lib", "nltk_data"), "/usr/share/nltk_data", "/usr/local/share/nltk_data",
+                 "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return dirs
+
+#Installed NLTK version as a tuple of ints, e.g. (3, 10, 3)
+#Read from the package metadata, which is the same as nltk.__version__ without the cost of importing NLTK
+@lru_cache(maxsize=None)
+def nltkVersion():
+    try:
+        from importlib.metadata import version
+        text = version("nltk")
+    except Exception:
+        import nltk
+        text = nltk.__version__
+    return tuple(int(part) for part in re.findall(r"\d+", text)[:3])
+
+#(download id, path) of a resource for the installed NLTK version
+def resourceInfo(name):
+    if name in NEW_RESOURCES and nltkVersion() >= NEW_RESOURCES_VERSION:
+        return NEW_RESOURCES[name]
+    return RESOURCES[name]
+
+#Return the path of an installed resource, or None; resources can be unpacked directories or zip files
+def findResource(name):
+    _, path = resourceInfo(name)
+    for dataDir in dataDirs():
+        for candidate in (os.path.join(dataDir, path), os.path.join(dataDir, path + ".zip")):
+            if os.path.exists(candidate):
+                return candidate
+    return None
+
+#Paths of the resources that were already found
+_found = {}
+
+#Check that every named resource is installed; raises MissingResourceError listing all missing ones
+#Found resources are remembered, so repeated checks are free
+def requireResources(*names):
+    missing = []
+    for name in names:
+        if name in _found:
+            continue
+        with timed("check " + name):
+            path = findResource(name)
+        if path is None:
+            missing.append(name)
+        else:
+            _found[name] = path
+
+    if missing:
+        downloadIds = " ".join(resourceInfo(name)[0] for name in missing)
+        raise MissingResourceError("Missing NLTK data: " + ", ".join(missing) +
+                                   "\nInstall it once with: python -m nltk.downloader " + downloadIds)
+
+#Check resources at the start of a script; prints the error and exits instead of raising
+def ensureResources(*names):
+    try:
+        requireResources(*names)
+    except MissingResourceError as e:
+        print("Error: " + str(e), file=sys.stderr)
+        sys.exit(1)
+
+#Return the import and load times as printable lines, slowest first
+def importReport():
+    lines = ["%-32s %8.1f ms" % (label, seconds * 1000) for label, seconds in sorted(IMPORT_TIMES.items(), key=lambda x: -x[1])]
+    return "\n".join(["NLP resource load times:"] + lines)
+
+if os.environ.get("NLP_RESOURCES_TIMING"):
+    atexit.register(lambda: print(importReport(), file=sys.stderr))
+
+#Return the English stopword set; loaded on first call
+@lru_cache(maxsize=None)
+def stopWords(language='english'):
+    requireResources("stopwords")
+    with timed("load stopwords"):
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words(language))
+
+#Return the shared WordNet lemmatizer; created on first call
+@lru_cache(maxsize=None)
+def lemmatizer():
+    requireResources("wordnet")
+    with timed("load lemmatizer"):
+        from nltk.stem import WordNetLemmatizer
+        return WordNetLemmatizer()
+
+#Lemmatize a word with the shared lemmatizer; results are cached with LRU eviction
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(word, pos='n'):
+    return lemmatizer().lemmatize(word, pos)
+
+#Return the WordNet corpus reader; checked and imported on first call
+@lru_cache(maxsize=None)
+def wordnet():
+    requireResources("wordnet")
+    with timed("load wordnet"):
+        from nltk.corpus import wordnet
+        return wordnet
+
+#Return the SentiWordNet corpus reader; checked and imported on first call
+@lru_cache(maxsize=None)
+def sentiwordnet():
+    requireResources("sentiwordnet", "wordnet")
+    with timed("load sentiwordnet"):
+        from nltk.corpus import sentiwordnet
+        return sentiwordnet
+
+#NLTK functions behind wordTokens, sentences and posTag; imported on first use
+@lru_cache(maxsize=None)
+def _nltkFunction(name):
+    with timed("import nltk." + name):
+        import nltk
+        return getattr(nltk, name)
+
+#Tokenize text with NLTK's word_tokenize
+#preserve_line=True skips the sentence splitter, for text that is already one sentence
+def wordTokens(text, preserve_line=False):
+    if not preserve_line:
+        requireResources("punkt")
+    return _nltkFunction("word_tokenize")(text, preserve_line=preserve_line)
+
+#Split text into sentences with NLTK's sent_tokenize
+def sentences(text):
+    requireResources("punkt")
+    return _nltkFunction("sent_tokenize")(text)
+
+#POS tag a list of tokens with NLTK's default tagger
+def posTag(tokens):
+    requireResources("tagger")
+    return _nltkFunction("pos_tag")(tokens)